@@ -0,0 +1,591 @@
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+logging.disable(logging.CRITICAL)
+
+from eds_pie.eds_pie import CIP_EDS, Parser, __version__
+from eds_pie.eds_lexer import EVENTS, Lexer, RegexLexer, TOKEN_TYPES
+from eds_pie import cip_eds_types, eds_references
+from eds_pie.eds import EDS_RefDatabase, EDS_RefLibrary
+
+PARAM_TEMPLATE = """    Param{0} =
+        0,                    $ reserved, shall equal 0
+        ,
+        ,                     $ Link Path Size, Link Packed EPATH
+        0x0010,               $ Descriptor
+        0xC7,                 $ Data Type : UINT
+        2,                    $ Data Size in bytes
+        "Parameter {0}",      $ Parameter Name
+        "ms",                 $ Units String
+        "Help text of parameter {0}",
+        0,
+        65535,
+        {0},                  $ min, max, default data values
+        ,
+        ,
+        ,
+        ,                     $ mult, div, base, offset scaling
+        ,
+        ,
+        ,
+        ,                     $ mult, div, base, offset links
+        ;                     $ Decimal Precision
+"""
+
+ICON_LINE = '        "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"\n'
+
+
+def make_eds(params=5000, icon_lines=5000):
+    """
+    Creates a large EDS content out of the demo EDS by adding Params entries
+    and IconContents data.
+    """
+    with open("demo.eds", "r") as srcfile:
+        eds_content = srcfile.read()
+
+    eds_content = eds_content.replace(
+        "[Params]\n",
+        "[Params]\n"
+        + "".join(PARAM_TEMPLATE.format(i) for i in range(2001, 2001 + params)),
+    )
+    eds_content = eds_content.replace(
+        "    IconContents =\n", "    IconContents =\n" + ICON_LINE * icon_lines
+    )
+    return eds_content
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def tokenize(lexer_class, eds_content):
+    lexer = lexer_class(eds_content)
+    while lexer.get_token().type != TOKEN_TYPES.EOF:
+        pass
+
+
+def bench_lexer(eds_content):
+    print("Lexer:")
+    for lexer_class in [Lexer, RegexLexer]:
+        duration = best_of(lambda: tokenize(lexer_class, eds_content))
+        print(f"    {lexer_class.__name__.ljust(24)} {duration * 1000:10.1f} ms")
+    print("Parser + validation:")
+    for lexer_class in [Lexer, RegexLexer]:
+        duration = best_of(lambda: CIP_EDS(eds_content, lexer_class=lexer_class))
+        print(f"    {lexer_class.__name__.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def measure_memory(func, peak=False):
+    tracemalloc.start()
+    result = func()
+    size, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak_size if peak else size
+
+
+def token_list(eds_content):
+    lexer = RegexLexer(eds_content)
+    tokens = []
+    while True:
+        token = lexer.get_token()
+        tokens.append(token)
+        if token.type == TOKEN_TYPES.EOF:
+            return tokens
+
+
+def bench_token_table(eds_content):
+    print("Token stream:")
+    duration = best_of(lambda: token_list(eds_content))
+    tokens, size = measure_memory(lambda: token_list(eds_content))
+    print(
+        f"    {'Token objects'.ljust(24)} {duration * 1000:10.1f} ms "
+        + f"{size / 1024:10.0f} KiB for {len(tokens)} tokens"
+    )
+    duration = best_of(lambda: RegexLexer(eds_content).tokenize_all())
+    table, size = measure_memory(lambda: RegexLexer(eds_content).tokenize_all())
+    print(
+        f"    {'TokenTable'.ljust(24)} {duration * 1000:10.1f} ms "
+        + f"{size / 1024:10.0f} KiB for {len(table)} tokens"
+    )
+    print("Parser:")
+    duration = best_of(lambda: Parser(eds_content, lexer_class=RegexLexer).parse())
+    print(f"    {'RegexLexer'.ljust(24)} {duration * 1000:10.1f} ms")
+    duration = best_of(lambda: Parser(table).parse())
+    print(f"    {'TokenTable (tokenized)'.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def read_and_parse(path, mode):
+    with open(path, mode) as srcfile:
+        return CIP_EDS(srcfile.read(), lexer_class=RegexLexer)
+
+
+def bench_bytes(eds_content):
+    fd, path = tempfile.mkstemp(suffix=".eds")
+    with os.fdopen(fd, "w") as dstfile:
+        dstfile.write(eds_content)
+    print("Parser + validation from file:")
+    try:
+        for title, func in [
+            ("decoded str", lambda: read_and_parse(path, "r")),
+            ("bytes", lambda: read_and_parse(path, "rb")),
+            ("mmap", lambda: CIP_EDS.from_path(path)),
+        ]:
+            duration = best_of(func)
+            _, peak = measure_memory(func, peak=True)
+            print(
+                f"    {title.ljust(24)} {duration * 1000:10.1f} ms "
+                + f"{peak / 1024:10.0f} KiB peak"
+            )
+    finally:
+        os.remove(path)
+
+
+def count_events(eds_content):
+    return sum(1 for _ in CIP_EDS.events(eds_content))
+
+
+def device_fields(eds_content):
+    fields = {}
+    for event in CIP_EDS.events(eds_content):
+        if event.section == "Device":
+            if event.event == EVENTS.FIELD:
+                fields.setdefault(event.entry, []).append(event.value)
+        elif fields:
+            # Past the Device section
+            break
+    return fields
+
+
+def bench_events(eds_content):
+    print("Streaming events:")
+    for title, func in [
+        ("CIP_EDS", lambda: CIP_EDS(eds_content, lexer_class=RegexLexer)),
+        ("events (all)", lambda: count_events(eds_content)),
+        ("events (Device only)", lambda: device_fields(eds_content)),
+    ]:
+        duration = best_of(func)
+        _, peak = measure_memory(func, peak=True)
+        print(
+            f"    {title.ljust(24)} {duration * 1000:10.1f} ms "
+            + f"{peak / 1024:10.0f} KiB peak"
+        )
+
+
+IDENTITY_SECTIONS = {"File", "Device", "Device Classification"}
+
+
+def bench_sections(eds_content):
+    print("Selective parsing + validation:")
+    for title, lexer_class, sections in [
+        ("Lexer, all sections", Lexer, None),
+        ("Lexer, identity", Lexer, IDENTITY_SECTIONS),
+        ("RegexLexer, all sections", RegexLexer, None),
+        ("RegexLexer, identity", RegexLexer, IDENTITY_SECTIONS),
+        ("RegexLexer, File only", RegexLexer, {"File"}),
+    ]:
+        duration = best_of(
+            lambda: CIP_EDS(eds_content, lexer_class=lexer_class, sections=sections)
+        )
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def read_identity(eds_content, lazy):
+    eds = CIP_EDS(eds_content, lexer_class=RegexLexer, lazy=lazy)
+    return [
+        eds.get_value("File", "DescText"),
+        eds.get_value("Device", "VendCode"),
+        eds.get_value("Device", "ProdName"),
+    ]
+
+
+def bench_lazy(eds_content):
+    print("Parse + validation, read 3 values:")
+    for title, lazy in [("eager", False), ("lazy", True)]:
+        duration = best_of(lambda: read_identity(eds_content, lazy))
+        _, peak = measure_memory(lambda: read_identity(eds_content, lazy), peak=True)
+        print(
+            f"    {title.ljust(24)} {duration * 1000:10.1f} ms "
+            + f"{peak / 1024:10.0f} KiB peak"
+        )
+    eds = CIP_EDS(eds_content, lexer_class=RegexLexer, lazy=True)
+    duration = best_of(lambda: str(eds))
+    print(f"    {'lazy, str() untouched'.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def bench_builder(eds_content):
+    eds_content = make_eds(params=5000, icon_lines=0)
+    print(f"Tree builder, 5000 Params ({len(eds_content)} bytes):")
+    for title, func in [
+        ("Parser", lambda: Parser(eds_content, lexer_class=RegexLexer).parse()),
+        ("Parser + validation", lambda: CIP_EDS(eds_content, lexer_class=RegexLexer)),
+        (
+            "columnar + validation",
+            lambda: CIP_EDS(eds_content, lexer_class=RegexLexer, columnar=True),
+        ),
+    ]:
+        duration = best_of(func)
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def edit_value(eds, eds_content, value):
+    start = eds_content.index(value)
+    eds.apply_text_edit(start, start + len(value), value)
+
+
+def bench_edit(eds_content):
+    print("Edit one field value + revalidation:")
+    eds = CIP_EDS(eds_content, lexer_class=RegexLexer)
+    for title, func in [
+        ("CIP_EDS (full reparse)", lambda: CIP_EDS(eds_content, lexer_class=RegexLexer)),
+        ("edit [Device]", lambda: edit_value(eds, eds_content, '"omidbimo"')),
+        ("edit [Params]", lambda: edit_value(eds, eds_content, "2001,   ")),
+    ]:
+        duration = best_of(func)
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def check_parallel_diagnostics(eds_content):
+    """
+    Checks that a parallel parse in recover mode reports the same diagnostics
+    as a serial one.
+    """
+    bad_content = eds_content.replace(
+        "        0x0010,               $ Descriptor\n", "        0x0010 = ,\n", 3
+    )
+    diagnostics = [
+        CIP_EDS(
+            bad_content, lexer_class=RegexLexer, recover=True, processes=processes
+        ).diagnostics
+        for processes in [1, 3]
+    ]
+    if not diagnostics[0] or diagnostics[0] != diagnostics[1]:
+        raise AssertionError("Parallel diagnostics differ from the serial ones")
+
+
+def bench_parallel(eds_content):
+    check_parallel_diagnostics(eds_content)
+    print(f"Parser + validation, processes ({os.cpu_count()} CPUs):")
+    for processes in [1, 2, 4]:
+        duration = best_of(
+            lambda: CIP_EDS(eds_content, lexer_class=RegexLexer, processes=processes)
+        )
+        print(f"    {str(processes).ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def count_nodes(eds):
+    entries = [entry for section in eds.sections.values() for entry in section.entries.values()]
+    return len(eds.sections) + len(entries) + sum(len(entry.fields) for entry in entries)
+
+
+def bench_memory(eds_content):
+    eds_content = make_eds(params=5000, icon_lines=0)
+    print("Memory of the parsed tree, 5000 Params:")
+    # The reference database of an empty EDS is not part of the tree
+    _, base_size = measure_memory(lambda: Parser("").parse())
+    for title, validate, columnar in [
+        ("Parser", False, False),
+        ("Parser + validation", True, False),
+        ("columnar", False, True),
+        ("columnar + validation", True, True),
+    ]:
+
+        def parse():
+            eds = Parser(eds_content, lexer_class=RegexLexer, columnar=columnar).parse()
+            if validate:
+                eds.validate()
+            return eds
+
+        eds, size = measure_memory(parse)
+        size -= base_size
+        nodes = count_nodes(eds)
+        print(
+            f"    {title.ljust(24)} {size / 1024:10.0f} KiB "
+            + f"{size / nodes:10.1f} bytes per node ({nodes} nodes)"
+        )
+
+
+def find_param_by_name(eds, name):
+    for entry in eds.sections["Params"].entries.values():
+        if entry.fields[6].value == name:
+            return entry
+    return None
+
+
+def bench_index(eds_content):
+    eds = CIP_EDS(make_eds(params=5000, icon_lines=0), lexer_class=RegexLexer)
+    entry = eds.get_entry("Connection Manager", "Connection1")
+    print("Lookups, 5000 Params (1000 calls):")
+    for title, func in [
+        ("get_section(class_id)", lambda: eds.get_section(class_id=0x06)),
+        ("get_param(number)", lambda: eds.get_param(4000)),
+        ("get_param(name)", lambda: eds.get_param("Parameter 4000")),
+        ("loop over Params", lambda: find_param_by_name(eds, "Parameter 4000")),
+        ("has_field(name)", lambda: entry.has_field("Help String")),
+    ]:
+        duration = min(timeit.repeat(func, number=1000, repeat=3))
+        print(f"    {title.ljust(24)} {duration * 1e6:10.1f} us")
+
+
+def param_limits(eds):
+    return [
+        (
+            entry.get_field_byname("Default Value").value,
+            entry.get_field_byname("Minimum Value").value,
+            entry.get_field_byname("Maximum Value").value,
+        )
+        for entry in eds.sections["Params"].entries.values()
+    ]
+
+
+def bench_query(eds_content):
+    eds = CIP_EDS(make_eds(params=5000, icon_lines=0), lexer_class=RegexLexer)
+    path = "Params/Param*/[Default Value, Minimum Value, Maximum Value]"
+    print("Default, min and max of 5000 Params:")
+    for title, func in [
+        ("get_field_byname loop", lambda: param_limits(eds)),
+        ("query", lambda: eds.query(path)),
+        ("query, columns", lambda: eds.query(path, columns=True)),
+    ]:
+        duration = best_of(func)
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def make_variants(base, count):
+    variants = []
+    for index in range(count):
+        eds = base()
+        eds.set_value("Device", "ProdName", 0, f"Variant {index}")
+        eds.set_value("Params", "Param2001", 11, index)
+        variants.append(eds)
+    return variants
+
+
+def bench_clone(eds_content):
+    eds_content = make_eds(params=5000, icon_lines=0)
+    eds = CIP_EDS(eds_content, lexer_class=RegexLexer)
+    print("3 variants with 2 changed values, 5000 Params:")
+    for title, base in [
+        ("reparse", lambda: CIP_EDS(eds_content, lexer_class=RegexLexer)),
+        ("clone", eds.clone),
+    ]:
+        duration = best_of(lambda: make_variants(base, 3))
+        _, size = measure_memory(lambda: make_variants(base, 3))
+        print(
+            f"    {title.ljust(24)} {duration * 1000:10.1f} ms "
+            + f"{size / 1024:10.0f} KiB"
+        )
+
+
+def set_defaults(eds, transaction):
+    def set_all():
+        for number in range(2001, 7001):
+            for value in (0, 1, number):
+                eds.set_value("Params", f"Param{number}", 11, value)
+
+    if transaction:
+        with eds.transaction():
+            set_all()
+    else:
+        set_all()
+
+
+def check_failed_commit(eds):
+    """
+    Checks that a transaction which fails on commit leaves the class ID index
+    of the EDS as it was.
+    """
+    sections_by_class_id = dict(eds.sections_by_class_id)
+    try:
+        with eds.transaction():
+            eds.add_section("Identity Class")
+            eds.add_entry("Identity Class", "Service_Description1")
+            for value in ['"Reset"', "5", "1", "Param9999", "Param9999"]:
+                eds.add_field("Identity Class", "Service_Description1", value)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("Commit with a missing reference did not fail")
+    if eds.sections_by_class_id != sections_by_class_id:
+        raise AssertionError("Rollback left the class ID index changed")
+
+
+def bench_transaction(eds_content):
+    eds = CIP_EDS(make_eds(params=5000, icon_lines=0), lexer_class=RegexLexer)
+    check_failed_commit(eds)
+    print("Set 3 x 5000 Param default values:")
+    for title, transaction in [("set_value", False), ("transaction", True)]:
+        duration = best_of(lambda: set_defaults(eds, transaction))
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def hash_text(eds):
+    return hashlib.blake2b(str(eds).encode(), digest_size=16).digest()
+
+
+def cold_content_hash(eds):
+    for section in eds.sections.values():
+        section.digests = None
+        for entry in section.entries.values():
+            entry.digests = None
+    return eds.content_hash()
+
+
+def bench_hash(eds_content):
+    eds = CIP_EDS(make_eds(params=5000, icon_lines=0), lexer_class=RegexLexer)
+    print("Content hash, 5000 Params:")
+    eds.content_hash()
+    for title, func in [
+        ("str(eds) + blake2b", lambda: hash_text(eds)),
+        ("content_hash, cold", lambda: cold_content_hash(eds)),
+        ("content_hash, cached", lambda: eds.content_hash()),
+        (
+            "content_hash, 1 change",
+            lambda: (
+                eds.set_value("Params", "Param2001", 11, 1),
+                eds.content_hash(),
+            ),
+        ),
+    ]:
+        duration = best_of(func)
+        print(f"    {title.ljust(24)} {duration * 1e6:10.1f} us")
+
+
+def add_comments(eds_content, banner_lines=20000):
+    """
+    Adds a comment banner to the EDS content and a comment to each entry line.
+    """
+    banner = "".join(
+        f"$ Revision {i}: vendor history line\n" for i in range(banner_lines)
+    )
+    return banner + eds_content.replace(";\n", "; $ vendor note\n")
+
+
+def bench_comments(eds_content):
+    eds_content = add_comments(make_eds(params=5000, icon_lines=0))
+    print("Comments, 20000 lines banner, 5000 Params:")
+    for title, keep_comments in [
+        ("keep_comments=True", True),
+        ("keep_comments=False", False),
+    ]:
+
+        def parse():
+            return Parser(
+                eds_content, lexer_class=RegexLexer, keep_comments=keep_comments
+            ).parse()
+
+        duration = best_of(parse)
+        _, size = measure_memory(parse)
+        print(
+            f"    {title.ljust(24)} {duration * 1000:10.1f} ms {size / 1024:10.0f} KiB"
+        )
+
+
+def bench_numbers(eds_content):
+    table = RegexLexer(eds_content).tokenize_all(lines=False)
+    values = [
+        table.value(index)
+        for index in range(len(table))
+        if table.types[index] == TOKEN_TYPES.NUMBER
+    ]
+    print(f"Numeric literals ({len(values)} NUMBER tokens, 3 conversions each):")
+    for title, classify in [
+        ("trial conversions", cip_eds_types.classify_by_trial),
+        ("pattern", cip_eds_types.classify_text.__wrapped__),
+        ("pattern, cached", cip_eds_types.classify_number),
+    ]:
+        duration = best_of(
+            lambda: [classify(value) for value in values for _ in range(3)]
+        )
+        print(f"    {title.ljust(24)} {duration * 1000:10.1f} ms")
+
+
+def bench_values(eds_content):
+    eds = CIP_EDS(make_eds(params=5000, icon_lines=0), lexer_class=RegexLexer)
+    data = [
+        field.data
+        for section in eds.sections.values()
+        for entry in section.entries.values()
+        for field in entry.fields
+    ]
+    shared = len({id(value) for value in data})
+    print("Data type objects, 5000 Params:")
+    print(f"    {'fields'.ljust(24)} {len(data):10}")
+    print(f"    {'data type objects'.ljust(24)} {shared:10}")
+
+
+def bench_deferred(eds_content):
+    eds_content = make_eds(params=5000, icon_lines=0)
+    print("Deferred field typing, 5000 Params:")
+    for title, deferred_types in [
+        ("deferred_types=False", False),
+        ("deferred_types=True", True),
+    ]:
+
+        def load():
+            return CIP_EDS(
+                eds_content, lexer_class=RegexLexer, deferred_types=deferred_types
+            )
+
+        duration = best_of(load)
+        _, size = measure_memory(load)
+        eds = load()
+        params = list(eds.get_section("Params").entries.values())
+        read_duration = best_of(
+            lambda: [entry.fields[7].value for entry in params], repeat=1
+        )
+        print(
+            f"    {title.ljust(24)} {duration * 1000:10.1f} ms {size / 1024:10.0f} KiB"
+            f" {read_duration * 1000:8.1f} ms 1st read"
+        )
+
+
+def bench_ref_library(eds_content):
+    with open("demo.eds", "r") as srcfile:
+        small_content = srcfile.read()
+    print("Reference libraries, demo EDS:")
+    for title, func in [
+        ("read JSON, check, cache", eds_references.build_cache),
+        ("load cache", eds_references.load_references),
+        ("load libraries", EDS_RefLibrary),
+        ("EDS_RefDatabase()", EDS_RefDatabase),
+        ("CIP_EDS()", lambda: CIP_EDS(small_content)),
+    ]:
+        duration = best_of(lambda: [func() for _ in range(20)]) / 20
+        print(f"    {title.ljust(24)} {duration * 1e6:10.1f} us")
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "tokens": bench_token_table,
+    "bytes": bench_bytes,
+    "events": bench_events,
+    "sections": bench_sections,
+    "lazy": bench_lazy,
+    "builder": bench_builder,
+    "edit": bench_edit,
+    "parallel": bench_parallel,
+    "memory": bench_memory,
+    "index": bench_index,
+    "query": bench_query,
+    "clone": bench_clone,
+    "transaction": bench_transaction,
+    "hash": bench_hash,
+    "comments": bench_comments,
+    "numbers": bench_numbers,
+    "values": bench_values,
+    "deferred": bench_deferred,
+    "refdb": bench_ref_library,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    eds_content = make_eds()
+    print(f"eds_pie v{__version__}, EDS size: {len(eds_content)} bytes")
+    for name in names:
+        BENCHMARKS[name](eds_content)
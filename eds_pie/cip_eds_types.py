@@ -27,13 +27,12 @@ SOFTWARE.
 from collections import namedtuple
 from calendar import monthrange
 from datetime import datetime, timedelta
+from functools import lru_cache
 import logging
+import re
 
 RANGE = namedtuple("RANGE", "min max")
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s.%(levelname)-8s %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -85,42 +84,103 @@ class CIP_TYPES(ENUMS):
     NTIME = 0xDF
 
 
-def getnumber(data):
+class NUMBER_KINDS(ENUMS):
+    INT = 1
+    FLOAT = 2
+    HEX = 3
+
+
+# Numeric literals in the order getnumber accepts them: int(), float() and
+# int(, 16). Binary literals are valid hexadecimal literals as well. The
+# pattern covers ASCII text, other text is converted by trial.
+DECIMAL_DIGITS = r"[0-9](?:_?[0-9])*"
+NUMBER_PATTERN = re.compile(
+    rf"""
+    \s*(?:
+        (?P<INT>[-+]?{DECIMAL_DIGITS})
+      | (?P<FLOAT>
+            [-+]?
+            (?:
+                (?:(?:{DECIMAL_DIGITS})?\.{DECIMAL_DIGITS}|{DECIMAL_DIGITS}\.?)
+                (?:[eE][-+]?{DECIMAL_DIGITS})?
+              | (?i:inf|infinity|nan)
+            )
+        )
+      | (?P<HEX>
+            [-+]?(?:0[xX](?:_?[0-9a-fA-F])+|[0-9a-fA-F](?:_?[0-9a-fA-F])*)
+        )
+    )\s*\Z
+    """,
+    re.VERBOSE | re.ASCII,
+)
+
+NUMBER_CACHE_SIZE = 8192
+
+# Values up to FLYWEIGHT_MAX_LENGTH chars share one data type object per data
+# type, up to FLYWEIGHT_CACHE_SIZE values per data type.
+FLYWEIGHT_MAX_LENGTH = 32
+FLYWEIGHT_CACHE_SIZE = 4096
+
+
+def classify_number(data):
     """
-    Converts an input of string type into its numeric representaion.
+    Returns the kind of number a string represents, see NUMBER_KINDS, and its
+    numeric value as (kind, value). (None, None) if it is not a number.
+    The results for strings are cached, so each literal is parsed once.
     """
     if data is None:
-        return None
+        return None, None
+    if type(data) is str:
+        return classify_text(data)
+    return classify_by_trial(data)
+
+
+@lru_cache(maxsize=NUMBER_CACHE_SIZE)
+def classify_text(data):
+    if data == "":
+        return None, None
+    match = NUMBER_PATTERN.match(data)
+    if match is not None:
+        kind = match.lastgroup
+        if kind == "INT":
+            return NUMBER_KINDS.INT, int(data)
+        if kind == "FLOAT":
+            return NUMBER_KINDS.FLOAT, float(data)
+        return NUMBER_KINDS.HEX, int(data, 16)
+    if data.isascii():
+        return None, None
+    return classify_by_trial(data)
+
+
+def classify_by_trial(data):
+    """
+    Classifies data which is not ASCII text by trying the conversions.
+    """
     if data == "":
-        return None
+        return None, None
     if isint(data):
-        return int(data)
+        return NUMBER_KINDS.INT, int(data)
     if isfloat(data):
-        return float(data)
+        return NUMBER_KINDS.FLOAT, float(data)
     if ishex(data):
-        return int(data, 16)
+        return NUMBER_KINDS.HEX, int(data, 16)
     if isbin(data):
-        return int(data, 2)
-    return None
+        return NUMBER_KINDS.HEX, int(data, 2)
+    return None, None
+
+
+def getnumber(data):
+    """
+    Converts an input of string type into its numeric representaion.
+    """
+    return classify_number(data)[1]
 
 
 def isnumber(data):
     """
     Checks if a string represents a numeric value.
     """
-    if data is None:
-        return False
-    if data == "":
-        return False
-    if isint(data):
-        return True
-    if isfloat(data):
-        return True
-    if ishex(data):
-        return True
-    if isbin(data):
-        return True
-    return False
+    return classify_number(data)[0] is not None
 
 
 def isint(data):
@@ -249,12 +309,87 @@ def gettime():
 
 
 class CIP_EDS_BASE_TYPE(object):
+    """
+    Immutable value of a CIP data type. The value is validated once when the
+    object is created. Objects of short string values are flyweights: they
+    are cached per data type and shared by all fields with the same value.
+    """
+
+    __slots__ = ("_value",)
     _typeid = None
     _range = []
+    _ranged = False  # The range is an argument of each object, see REF
+    _flyweights = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._flyweights = {}
+
+    def __new__(cls, value, *args):
+        return cls.shared(cls.create, value, args)
+
+    @classmethod
+    def from_valid(cls, value, *args):
+        """
+        Returns the object of a value which validate already accepted, without
+        validating it again.
+        """
+        return cls.shared(cls.build, value, args)
+
+    @classmethod
+    def shared(cls, factory, value, args):
+        """
+        Returns the flyweight of the value, created by factory on first use.
+        """
+        if type(value) is not str or len(value) > FLYWEIGHT_MAX_LENGTH:
+            return factory(value, *args)
+        # The range arguments are kept alive by the cached objects, their ids
+        # are not reused while they are cached.
+        key = (value, id(args[0])) if cls._ranged else value
+        data = cls._flyweights.get(key)
+        if data is None:
+            data = factory(value, *args)
+            if len(cls._flyweights) < FLYWEIGHT_CACHE_SIZE:
+                cls._flyweights[key] = data
+        return data
+
+    @classmethod
+    def create(cls, value, *args):
+        """
+        Validates the value and returns a new object of it.
+        """
+        if not cls.validate(value, *args):
+            raise cls.invalid_value(value)
+        return cls.build(value, *args)
+
+    @classmethod
+    def build(cls, value, *args):
+        data = object.__new__(cls)
+        object.__setattr__(data, "_value", value)
+        return data
+
+    @classmethod
+    def invalid_value(cls, value):
+        if cls._typeid is None:
+            return Exception(
+                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
+            )
+        return Exception(
+            __name__
+            + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} objects are immutable")
 
-    def __init__(self, value, *args):
-        self._value = value
-        # sele._range = *args
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @property
     def range(self):
@@ -269,16 +404,25 @@ class CIP_EDS_BASE_TYPE(object):
         raise (NotImplementedError)
 
     def __repr__(self):
-        return f"{self.__class__.__name__}({self.__value})"
+        return f"{self.__class__.__name__}({self._value})"
 
     def __str__(self):
         return f"{self._value}"
 
 
 class CIP_EDS_BASE_INT(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, value, *args):
+        number = getnumber(value)
+        if number is None or not cls._range.min <= number <= cls._range.max:
+            raise cls.invalid_value(value)
+        return super().build(number)
 
-    def __init__(self, value, *args):
-        self._value = getnumber(value)
+    @classmethod
+    def build(cls, value, *args):
+        return super().build(getnumber(value))
 
     @classmethod
     def validate(cls, value, *args):
@@ -335,300 +479,113 @@ class CIP_EDS_BASE_INT(CIP_EDS_BASE_TYPE):
 
 
 class BOOL(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.BOOL
     _range = RANGE(0, 1)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(BOOL, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(BOOL, self).__init__(value)
-
 
 class USINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.USINT
     _range = RANGE(0, 255)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(USINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(USINT, self).__init__(value)
-
 
 class SINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.USINT
     _range = RANGE(0, 255)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(SINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(SINT, self).__init__(value)
-
 
 class UINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.UINT
     _range = RANGE(0, 65535)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(UINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(UINT, self).__init__(value)
-
 
 class INT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.INT
     _range = RANGE(-32768, 32767)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(INT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(INT, self).__init__(value)
-
 
 class UDINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.UDINT
     _range = RANGE(0, 4294967295)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(UDINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(UDINT, self).__init__(value)
-
 
 class DINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.DINT
     _range = RANGE(-2147483648, 2147483647)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(DINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(DINT, self).__init__(value)
-
 
 class ULINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.ULINT
     _range = RANGE(0, 18446744073709551615)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(ULINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(ULINT, self).__init__(value)
-
 
 class LINT(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.LINT
     _range = RANGE(-9223372036854775808, 9223372036854775807)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(LINT, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(LINT, self).__init__(value)
-
 
 class BYTE(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.BYTE
     _range = RANGE(0, 255)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(BYTE, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(BYTE, self).__init__(value)
-
     def __str__(self):
         return f"0x{self._value:02X}"
 
 
 class WORD(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.WORD
     _range = RANGE(0, 65535)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(WORD, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(WORD, self).__init__(value)
-
     def __str__(self):
         return f"0x{self._value:04X}"
 
 
 class DWORD(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.DWORD
     _range = RANGE(0, 4294967295)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(DWORD, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(DWORD, self).__init__(value)
-
     def __str__(self):
         return f"0x{self._value:08X}"
 
 
 class LWORD(CIP_EDS_BASE_INT):
+    __slots__ = ()
     _typeid = CIP_TYPES.LWORD
     _range = RANGE(0, 18446744073709551615)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(LWORD, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(LWORD, self).__init__(value)
-
 
 class REAL(CIP_EDS_BASE_INT):  # TODO: improve validate
+    __slots__ = ()
     _typeid = CIP_TYPES.REAL
     _range = RANGE(-16777216.0, 16777216.0)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(REAL, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(REAL, self).__init__(value)
-
 
 class LREAL(CIP_EDS_BASE_INT):  # TODO: improve validate
+    __slots__ = ()
     _typeid = CIP_TYPES.LREAL
     _range = RANGE(-9007199254740992.0, 9007199254740992.0)
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(LREAL, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(LREAL, self).__init__(value)
-
 
 class STIME(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
     _typeid = CIP_TYPES.STIME
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(STIME, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(STIME, self).__init__(value)
-
 
 class STRING(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
     _typeid = CIP_TYPES.STRING
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(STRING, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(STRING, self).__init__(value)
-
     @classmethod
     def validate(cls, value, *args):
         return isinstance(value, str)
@@ -638,20 +595,9 @@ class STRING(CIP_EDS_BASE_TYPE):
 
 
 class STRINGI(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
     _typeid = CIP_TYPES.STRINGI
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(STRINGI, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        self._range = ["mm-dd-yyyy"]
-        super(STRINGI, self).__init__(value)
+    _range = ["mm-dd-yyyy"]
 
     @classmethod
     def validate(cls, value, *args):
@@ -663,42 +609,20 @@ class STRINGI(CIP_EDS_BASE_TYPE):
 
 
 class DATE(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
+
     # EDS_DATE mm.dd.yyyy from 1994 to 9999
     _range = ["mm.dd.yyyy", "mm.dd.yy"]
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(DATE, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(DATE, self).__init__(value)
-
     @staticmethod
     def validate(value, *args):
         return isdate(value)
 
 
 class TIME(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
     _typeid = CIP_TYPES.TIME
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(TIME, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        self.__value = value
-        super(TIME, self).__init__(value)
-
     @property
     def range(self):
         return ["HH:MM:SS"]  # TODO
@@ -737,20 +661,9 @@ class TIME(CIP_EDS_BASE_TYPE):
 
 
 class EPATH(CIP_EDS_BASE_TYPE):
+    __slots__ = ()
     _typeid = CIP_TYPES.EPATH
 
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(EPATH, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(EPATH, self).__init__(value)
-
     @staticmethod
     def validate(value, *args):
         try:
@@ -775,18 +688,7 @@ class EPATH(CIP_EDS_BASE_TYPE):
 
 
 class REVISION(CIP_EDS_BASE_TYPE):
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(REVISION, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__
-                + f":> Invalid value: {value} for <{cls.__name__} (CIP typeID: 0x{cls._typeid:X})> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(REVISION, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
@@ -804,17 +706,14 @@ class REVISION(CIP_EDS_BASE_TYPE):
 
 
 class REF(CIP_EDS_BASE_TYPE):
-    def __new__(cls, value, *args):
-        if cls.validate(value, *args):
-            return super(REF, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
+    __slots__ = ("_range",)
+    _ranged = True
 
-    def __init__(self, value, *args):
-        self._range = args[0]  # TODO
-        super(REF, self).__init__(value)
+    @classmethod
+    def build(cls, value, *args):
+        data = super().build(value)
+        object.__setattr__(data, "_range", args[0])
+        return data
 
     @staticmethod
     def validate(value, *args):
@@ -828,18 +727,14 @@ class REF(CIP_EDS_BASE_TYPE):
 
 
 class KEYWORD(CIP_EDS_BASE_TYPE):
+    __slots__ = ("_range",)
+    _ranged = True
 
-    def __new__(cls, value, *args):
-        if cls.validate(value, *args):
-            return super(KEYWORD, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        self._range = args[0]
-        super(KEYWORD, self).__init__(value)
+    @classmethod
+    def build(cls, value, *args):
+        data = super().build(value)
+        object.__setattr__(data, "_range", args[0])
+        return data
 
     @staticmethod
     def validate(value, *args):
@@ -850,17 +745,7 @@ class KEYWORD(CIP_EDS_BASE_TYPE):
 
 
 class DATATYPE_REF(CIP_EDS_BASE_TYPE):
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(DATATYPE_REF, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(DATATYPE_REF, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
@@ -868,17 +753,7 @@ class DATATYPE_REF(CIP_EDS_BASE_TYPE):
 
 
 class EDS_SERVICE(CIP_EDS_BASE_TYPE):
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(EDS_SERVICE, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(EDS_SERVICE, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
@@ -886,17 +761,7 @@ class EDS_SERVICE(CIP_EDS_BASE_TYPE):
 
 
 class EMPTY(CIP_EDS_BASE_TYPE):
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(EMPTY, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(EMPTY, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
@@ -909,17 +774,7 @@ class EMPTY(CIP_EDS_BASE_TYPE):
 
 
 class VENDOR_SPECIFIC(CIP_EDS_BASE_TYPE):
-
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(VENDOR_SPECIFIC, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        super(VENDOR_SPECIFIC, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
@@ -934,17 +789,7 @@ class VENDOR_SPECIFIC(CIP_EDS_BASE_TYPE):
 
 
 class UNDEFINED(CIP_EDS_BASE_TYPE):
-    def __new__(cls, value, *args):
-        if cls.validate(value):
-            return super(UNDEFINED, cls).__new__(cls)
-        else:
-            raise Exception(
-                __name__ + f":> Invalid value: {value} for <{cls.__name__}> data type."
-            )
-
-    def __init__(self, value, *args):
-        self.__value = value
-        super(UNDEFINED, self).__init__(value)
+    __slots__ = ()
 
     @staticmethod
     def validate(value, *args):
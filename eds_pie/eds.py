@@ -1,24 +1,44 @@
 import os
+import copy
 import json
+import math
 import numbers
-from pathlib import Path
+from array import array
+from hashlib import blake2b
+from operator import attrgetter
 from string import digits
+from sys import intern
 import logging
+import threading
 
 import eds_pie.cip_eds_types as eds_types
+from eds_pie.eds_query import compile_query
+from eds_pie.eds_references import load_references
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s.%(levelname)-8s %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
 class EDS:
-    def __init__(self):
+    def __init__(self, field_columns=None, ref_db=None):
+        """
+        field_columns is a FieldColumns storage of the fields. By default each
+        field is a Field object. ref_db is the EDS_RefDatabase to use, by
+        default a new one on the reference libraries shared by the process.
+        """
         self.protocol = None
         self.classification = None
-        self.ref_db = EDS_RefDatabase()
-        self.sections = {}
+        self.ref_db = EDS_RefDatabase() if ref_db is None else ref_db
+        self.sections = LazySections(on_load=self.section_loaded)
+        self.skipped_sections = set()  # Keywords of sections skipped by the parser
+        self.validated = False
+        self.diagnostics = []  # Syntax errors found by an error-recovering parse
+        self.parser = None  # Parser holding the eds data, used by apply_text_edit
+        self.field_columns = field_columns
+        self.sections_by_class_id = {}  # Validated sections by CIP class ID
+        self.active_transaction = None  # Transaction collecting the changes
+        # Validation only records the data types of parsed fields, the data
+        # type objects are created on access
+        self.deferred_types = False
         self.hcomment = ""  # Heading comment
         self.fcomment = ""  # End comment
 
@@ -33,7 +53,14 @@ class EDS:
         if section_keyword:
             return self.sections.get(section_keyword)
 
-        return self.sections.get(self.protocol_db.get_section_name(class_id))
+        section = self.sections_by_class_id.get(class_id)
+        if section is not None:
+            return section
+        # The class ID of a section is known after its validation
+        section_keyword = self.ref_db.get_section_name_byclass_id(class_id)
+        if section_keyword:
+            return self.sections.get(section_keyword)
+        return None
 
     def get_entry(self, section_keyword, entry_keyword):
         """
@@ -59,11 +86,57 @@ class EDS:
             return field.value
         return None
 
+    def get_param(self, param):
+        """
+        To get a [Params] entry by its number, e.g. 12 for Param12, or by the
+        value of its Parameter Name field.
+        """
+        section = self.sections.get("Params")
+        if section is None:
+            return None
+        if isinstance(param, numbers.Number):
+            return section.get_entry_bynumber("Param", param)
+        return section.get_entry_byparamname(param)
+
+    def query(self, path, columns=False):
+        """
+        To select field values by a path query, e.g.
+        "Params/Param*/[Default Value, Minimum Value, Maximum Value]".
+        Returns a list of (section keyword, entry keyword, value, ...) tuples,
+        or a list of columns if columns is True. See eds_query.Query.
+        """
+        query = compile_query(path)
+        if columns:
+            return query.columns(self)
+        return query.rows(self)
+
+    def content_hash(self, comments=True):
+        """
+        Returns a digest of the content of the EDS built from the content hashes
+        of its sections. Comments are left out if comments is False.
+        """
+        parts = [section.content_hash(comments) for section in self.sections.values()]
+        if comments:
+            parts.append(f"\0{self.hcomment}\0{self.fcomment}".encode())
+        return content_digest(b"".join(parts))
+
     def set_value(self, section_keyword, entry_keyword, field_index, value):
-        field = self.get_field(section_keyword, entry_keyword, field_index)
+        field = None
+        entry = self.own_entry(section_keyword, entry_keyword)
+        if entry is not None:
+            field = entry.get_field(field_index)
         if field is None:
             raise Exception("Not a valid field! Unable to set the field value.")
-        field.value = value
+        if self.active_transaction is not None:
+            self.active_transaction.set_value(entry, field, value)
+        else:
+            field.value = value
+
+    def transaction(self):
+        """
+        Returns a Transaction to batch changes in a with block, see Transaction.
+        """
+        return Transaction(self)
 
     def has_section(self, section_keyword):
         """
@@ -72,8 +145,10 @@ class EDS:
         if isinstance(section_keyword, str):
             return section_keyword in self.sections.keys()
         if isinstance(section_keyword, numbers.Number):
+            if section_keyword in self.sections_by_class_id:
+                return True
             return (
-                self.protocol_db.get_section_name(section_keyword)
+                self.ref_db.get_section_name_byclass_id(section_keyword)
                 in self.sections.keys()
             )
         raise TypeError(f"Inappropriate data type: {type(section_keyword)}")
@@ -102,14 +177,19 @@ class EDS:
         )
         section = Section(self, section_keyword, section_name, None, line_number)
         self.sections.update({section_keyword: section})
+        if self.active_transaction is not None:
+            self.active_transaction.section_added(section)
 
         return section
 
     def add_entry(self, section_keyword, entry_keyword, line_number=0):
-        section = self.get_section(section_keyword)
+        section = self.own_section(section_keyword)
         if section is None:
             raise Exception(f"Section not found! [{section_keyword}]")
-        return section.add_entry(entry_keyword, line_number)
+        entry = section.add_entry(entry_keyword, line_number)
+        if self.active_transaction is not None:
+            self.active_transaction.entry_added(entry)
+        return entry
 
     def add_field(
         self,
@@ -122,26 +202,31 @@ class EDS:
         """
         Fields must be added in order and no random access is allowed.
         """
-        section = self.get_section(section_keyword)
-
-        if section is None:
+        if self.get_section(section_keyword) is None:
             raise Exception(f"Section not found! [{section_keyword}]")
 
-        entry = section.get_entry(entry_keyword)
+        entry = self.own_entry(section_keyword, entry_keyword)
         if entry is None:
             raise Exception(f"Entry not found! [{entry_keyword}]")
-        return entry.add_field(field_value, field_data_type, line_number)
+        field = entry.add_field(field_value, field_data_type, line_number)
+        if self.active_transaction is not None:
+            self.active_transaction.field_added(entry, field)
+        return field
 
     def remove_section(self, section_keyword, removetree=False):
         section = self.get_section(section_keyword)
 
         if section is None:
             return
-        if not section.entries:
-            del self.sections[section_keyword]
-        elif removetree:
-            for entry in section.entries:
-                self.remove_entry(section_keyword, entry.keyword, removetree)
+        if not section.entries or removetree:
+            if self.active_transaction is not None:
+                # The entries are released when the transaction is committed
+                self.active_transaction.section_removed(section)
+            # The entries of a shared section stay with the clones
+            elif not section.shared:
+                for entry_keyword in list(section.entries):
+                    self.remove_entry(section_keyword, entry_keyword, removetree)
+            self.unindex_section(section)
             del self.sections[section_keyword]
         else:
             logger.error(
@@ -153,20 +238,96 @@ class EDS:
         entry = self.get_entry(section_keyword, entry_keyword)
         if entry is None:
             return
-        if not entry.fields:
-            section = self.get_section(section_keyword)
-            del section.entries[entry_keyword]
-        elif removetree:
-            entry.fields = []
+        if not entry.fields or removetree:
+            section = self.own_section(section_keyword)
+            if self.active_transaction is not None:
+                # The fields are released when the transaction is committed
+                self.active_transaction.entry_removed(section, entry)
+            # The fields of a shared entry stay with the clones
+            elif entry.fields and not entry.shared:
+                entry.fields.clear()
+            section.remove_entry(entry_keyword)
         else:
             logger.error(
-                f"Unable to remove entry! [{section.keyword}].{entry.keyword} contains one or more fields."
+                f"Unable to remove entry! [{section_keyword}].{entry.keyword} contains one or more fields."
                 + "Remove the fields first or use removetree = True"
             )
 
     def remove_field(self, section_keyword, sentryname, fieldindex):
         raise NotImplementedError
 
+    def clone(self):
+        """
+        Returns a copy of the EDS which shares the sections and entries with
+        this EDS. A shared section or entry is copied the first time it is
+        changed through set_value, add_entry, add_field, remove_section or
+        remove_entry of either EDS. Changes made directly on the Section, Entry
+        and Field objects are not copied and affect all clones.
+        A lazy EDS parses all its sections first. The clone has no EDS data
+        for apply_text_edit.
+        """
+        self.sections.load_all()
+        eds = EDS(self.field_columns, copy.copy(self.ref_db))
+        eds.protocol = self.protocol
+        eds.classification = self.classification
+        for section_keyword, section in self.sections.items():
+            section.shared = True
+            eds.sections[section_keyword] = section
+        eds.skipped_sections = set(self.skipped_sections)
+        eds.validated = self.validated
+        eds.deferred_types = self.deferred_types
+        eds.diagnostics = list(self.diagnostics)
+        eds.sections_by_class_id = dict(self.sections_by_class_id)
+        eds.hcomment = self.hcomment
+        eds.fcomment = self.fcomment
+        return eds
+
+    def own_section(self, section_keyword):
+        """
+        Returns a section to be changed. A section shared with clones of the
+        EDS is replaced by a copy first.
+        """
+        section = self.get_section(section_keyword)
+        if section is None or not section.shared:
+            return section
+        section_copy = section.copy(self)
+        self.sections[section.keyword] = section_copy
+        if self.sections_by_class_id.get(section.class_id) is section:
+            self.sections_by_class_id[section.class_id] = section_copy
+        return section_copy
+
+    def own_entry(self, section_keyword, entry_keyword):
+        """
+        Returns an entry to be changed. An entry shared with clones of the EDS
+        is replaced by a copy first.
+        """
+        if self.get_entry(section_keyword, entry_keyword) is None:
+            return None
+        section = self.own_section(section_keyword)
+        entry = section.get_entry(entry_keyword)
+        if entry.shared:
+            entry = section.replace_entry(entry.copy(section))
+        return entry
+
+    def unshare_sections(self, section_keywords):
+        """
+        Copies the parsed sections and their entries which are shared with
+        clones of the EDS.
+        """
+        for section_keyword in section_keywords:
+            if self.sections.is_loaded(section_keyword):
+                section = self.own_section(section_keyword)
+                for entry_keyword, entry in list(section.entries.items()):
+                    if entry.shared:
+                        section.replace_entry(entry.copy(section))
+
+    def unindex_section(self, section):
+        """
+        Removes a section which is removed from the EDS from the indexes.
+        """
+        if self.sections_by_class_id.get(section.class_id) is section:
+            del self.sections_by_class_id[section.class_id]
+
     def save(self, filename, overwrite=False):
         if os.path.isfile(filename) and overwrite is False:
             raise Exception(
@@ -277,18 +438,24 @@ class EDS:
         """
         # Check if required sections are at required positions
         sections_list = list(self.sections)  # Create a list of dictionary keys
-        if len(self.sections) > 0 and sections_list[0] != "File":
-            logger.warning(
-                f"First section expected to be [File]. Found: [{sections_list[0]}]"
-            )
+        # Positions are unknown if the parser skipped sections
+        if not self.skipped_sections:
+            if len(self.sections) > 0 and sections_list[0] != "File":
+                logger.warning(
+                    f"First section expected to be [File]. Found: [{sections_list[0]}]"
+                )
 
-        if len(self.sections) > 1 and sections_list[1] != "Device":
-            logger.warning(
-                f"Second section expected to be [Device]. Found: [{sections_list[1]}]"
-            )
+            if len(self.sections) > 1 and sections_list[1] != "Device":
+                logger.warning(
+                    f"Second section expected to be [Device]. Found: [{sections_list[1]}]"
+                )
 
         device_classification_section = self.sections.get("Device Classification", None)
-        if len(self.sections) > 2 and device_classification_section is None:
+        if (
+            len(self.sections) > 2
+            and device_classification_section is None
+            and "Device Classification" not in self.skipped_sections
+        ):
             logger.warning("Missing required section [Device Classification]")
 
         # Device Classification
@@ -329,120 +496,176 @@ class EDS:
                             self.protocol = entry.value
                         self.ref_db.set_protocol(self.protocol)
 
+        # Sections loaded later on are validated on load
+        self.validated = True
+        sections = self.sections.loaded()
+
         # Validate sections, entries and fields then assign a data type to each field if possible
-        for _, section in self.sections.items():
-            section_name = self.ref_db.get_section_name(section.keyword)
-            if section_name is None:
-                if not eds_types.VENDOR_SPECIFIC.validate(section.keyword):
-                    logger.warning(f"Unknown Section [{section.keyword}]")
-            else:
-                # replace the default name with the correct one from reflib
-                section.name = section_name
-                section.class_id = self.ref_db.get_section_class_id(section.keyword)
+        for section in sections:
+            self.validate_section(section)
 
-            for _, entry in section.entries.items():
-                entry_name = self.ref_db.get_entry_name(section.keyword, entry.keyword)
-                if entry_name is None:
-                    if not eds_types.VENDOR_SPECIFIC.validate(
-                        section.keyword
-                    ) and not eds_types.VENDOR_SPECIFIC.validate(entry.keyword):
-                        logger.warning(
-                            "Unknown Entry [{section.keyword,}].{entry.keyword}"
-                        )
+        for section in sections:
+            self.validate_references(section)
+
+    def validate_section(self, section):
+        """
+        Validates the entries and fields of a section and assigns a data type
+        to each field if possible.
+        """
+        section_name = self.ref_db.get_section_name(section.keyword)
+        if section_name is None:
+            if not eds_types.VENDOR_SPECIFIC.validate(section.keyword):
+                logger.warning(f"Unknown Section [{section.keyword}]")
+        else:
+            # replace the default name with the correct one from reflib
+            section.name = section_name
+            section.class_id = self.ref_db.get_section_class_id(section.keyword)
+            if section.class_id:
+                self.sections_by_class_id[section.class_id] = section
+
+        for _, entry in section.entries.items():
+            self.validate_entry(section, entry)
+
+    def validate_entry(self, section, entry):
+        """
+        Validates an entry and its fields, see validate_section.
+        """
+        entry_name = self.ref_db.get_entry_name(section.keyword, entry.keyword)
+        if entry_name is None:
+            if not eds_types.VENDOR_SPECIFIC.validate(
+                section.keyword
+            ) and not eds_types.VENDOR_SPECIFIC.validate(entry.keyword):
+                logger.warning("Unknown Entry [{section.keyword,}].{entry.keyword}")
+        else:
+            # replace the default name with the correct one from reflib
+            entry.name = entry_name
+
+        entry.field_indexes = None  # The fields are renamed
+        for field_index, field in enumerate(entry.fields):
+            self.validate_field(section, entry, field_index, field)
+
+    def validate_field(self, section, entry, field_index, field):
+        """
+        Names a field and assigns a data type to it if the reference database
+        knows the field. With deferred_types the data type of a parsed field
+        is only recorded, see Field.defer_type.
+        """
+        ref_field = self.ref_db.get_field_byindex(
+            section.keyword, entry.keyword, field_index
+        )
+        if ref_field is not None:
+            field.name = ref_field.get("name", None)
+            data_types = ref_field.get("data_types", None)
+            field.data_types = data_types
+            value = field.value
+            data_type = self.ref_db.get_field_type(data_types, value)
+
+            if data_type is not None:
+                if self.deferred_types and field.raw_value is not None:
+                    field.defer_type(data_type)
                 else:
-                    # replace the default name with the correct one from reflib
-                    entry.name = entry_name
+                    field.data = data_type.from_valid(
+                        value, data_types[data_type.__name__]
+                    )
+                return
 
-                for field_index, field in enumerate(entry.fields):
-                    if self.ref_db.has_field(
-                        section.keyword, entry.keyword, field_index
-                    ):
-                        field.name = self.ref_db.get_field_name(
-                            section.keyword, entry.keyword, field_index
-                        )
-                        field.data_types = self.ref_db.get_field_data_types(
-                            section.keyword, entry.keyword, field_index
-                        )
-                        field_data_object = self.ref_db.assign_type_to_field(
-                            section.keyword, entry.keyword, field_index, field.value
-                        )
+            # Failed to find a proper data type for the field.
+            # Handle special case of EnumN keyword
+            if section.name == "Parameters" and "Enum" in entry.keyword:
+                associated_param_field = self.get_field(
+                    "Params", entry.keyword.replace("Enum", "Param"), 4
+                )
+                type_name = None
+                if associated_param_field is not None:
+                    type_name = eds_types.CIP_TYPES.stringify(
+                        eds_types.getnumber(associated_param_field.value)
+                    )
+                if type_name:
+                    field.data = self.ref_db.get_type(type_name)(value)
+                    return
 
-                        # Failed to find a proper data type for the field.
-                        # Handle special case of EnumN keyword
-                        if (
-                            field_data_object is None
-                            and section.name == "Parameters"
-                            and "Enum" in entry.keyword
-                        ):
-                            associated_param_field = self.get_field(
-                                "Params", entry.keyword.replace("Enum", "Param"), 4
-                            )
-                            type_name = eds_types.CIP_TYPES.stringify(
-                                eds_types.getnumber(associated_param_field.value)
-                            )
-                            if type_name:
-                                field_data_object = self.ref_db.get_type(type_name)(
-                                    field.value
-                                )
+            # Wasn't able to assign a data type to this field.
+            # Introduce the list of acceptable data types for this specific field
+            types_str = ", ".join(
+                f"<{type_name}({type_meta})>"
+                for type_name, type_meta in data_types.items()
+            )
+            if value != "":
+                logger.error(
+                    "Data_type mismatch! [{}].{}.{} = ({}), Field should be of type: {}".format(
+                        section.keyword,
+                        entry.keyword,
+                        field_index,
+                        value,
+                        types_str,
+                    )
+                )
+        else:
+            if not eds_types.VENDOR_SPECIFIC.validate(
+                section.keyword
+            ) and not eds_types.VENDOR_SPECIFIC.validate(entry.keyword):
+                logger.warning(
+                    f"Unknown Field [{section.keyword}].{entry.keyword}.{field.name}"
+                )
 
-                        if field_data_object is not None:
-                            field.data = field_data_object
+    def validate_references(self, section):
+        """
+        Checks if the entries referenced by the fields of a section exist.
+        """
+        for _, entry in section.entries.items():
+            for field in entry.fields:
+                error = self.check_reference(section, entry, field)
+                if error:
+                    logger.error(error)
 
-                        else:
-                            # Wasn't able to assign a data type to this field.
-                            # Introduce the list of acceptable data types for this specific field
-                            data_types = self.ref_db.get_field_data_types(
-                                section.keyword, entry.keyword, field_index
-                            )
-                            types_str = ", ".join(
-                                f"<{type_name}({type_meta})>"
-                                for type_name, type_meta in data_types.items()
-                            )
-                            if field.value != "":
-                                logger.error(
-                                    "Data_type mismatch! [{}].{}.{} = ({}), Field should be of type: {}".format(
-                                        section.keyword,
-                                        entry.keyword,
-                                        field_index,
-                                        field.value,
-                                        types_str,
-                                    )
-                                )
-                    else:
-                        if not eds_types.VENDOR_SPECIFIC.validate(
-                            section.keyword
-                        ) and not eds_types.VENDOR_SPECIFIC.validate(entry.keyword):
-                            logger.warning(
-                                f"Unknown Field [{section.keyword}].{entry.keyword}.{field.name}"
-                            )
+    def check_reference(self, section, entry, field):
+        """
+        Returns an error message if the entry referenced by a REF field does not
+        exist, None otherwise.
+        """
+        if not issubclass(field.data_type, eds_types.REF):
+            return None
+        if "Param" in field.value:
+            target_keyword = "Params"
+        elif "Assem" in field.value:
+            target_keyword = "Assembly"
+        else:
+            logger.warning("Reference checking not implemented!")
+            # TODO
+            return None
+        if (
+            self.get_entry(target_keyword, field.value) is None
+            and target_keyword not in self.skipped_sections
+        ):
+            return "Missing referenced Entry [{}].{} required by [{}].{}.{}".format(
+                target_keyword,
+                field.value,
+                section.keyword,
+                entry.keyword,
+                field.name,
+            )
+        return None
 
-        for _, section in self.sections.items():
-            for _, entry in section.entries.items():
-                for field in entry.fields:
-                    if isinstance(field.data, eds_types.REF):
-                        if "Param" in field.value:
-                            if self.get_entry("Params", field.value) is None:
-                                logger.error(
-                                    "Missing referenced Entry [Params].{} required by [{}].{}.{}".format(
-                                        field.value,
-                                        section.keyword,
-                                        entry.keyword,
-                                        field.name,
-                                    )
-                                )
-                        elif "Assem" in field.value:
-                            if self.get_entry("Assembly", field.value) is None:
-                                logger.error(
-                                    "Missing referenced Entry [Assembly].{} required by [{}].{}.{}".format(
-                                        field.value,
-                                        section.keyword,
-                                        entry.keyword,
-                                        field.name,
-                                    )
-                                )
-                        else:
-                            logger.warning("Reference checking not implemented!")
-                            # TODO
+    def apply_text_edit(self, start, end, new_text):
+        """
+        Replaces eds_data[start:end] of the parsed EDS data by new_text. Only the
+        sections touched by the edit are reparsed and replaced in self.sections,
+        the sections after the edit are moved. If the EDS is validated, the new
+        sections are validated and their references checked. A change of the
+        Device Classification revalidates the whole EDS.
+        Returns the list of the new sections.
+        """
+        if self.parser is None:
+            raise Exception("The EDS data is not available for a text edit!")
+        return self.parser.apply_text_edit(start, end, new_text)
+
+    def section_loaded(self, section):
+        """
+        Called for each section parsed on demand in lazy mode.
+        """
+        if self.validated:
+            self.validate_section(section)
+            self.validate_references(section)
 
     def __str__(self):
         indent = 4
@@ -454,26 +677,27 @@ class EDS:
             )
 
         # sections
-        sorted_sections = []
-        section = self.get_section("File")
-        if section:
-            sorted_sections.append(section)
-
-        section = self.get_section("Device")
-        if section:
-            sorted_sections.append(section)
-
-        section = self.get_section("Device Classification")
-        if section:
-            sorted_sections.append(section)
-
-        sorted_sections += [
-            section
-            for key, section in self.sections.items()
-            if section not in sorted_sections
+        sorted_keywords = [
+            keyword
+            for keyword in ["File", "Device", "Device Classification"]
+            if keyword in self.sections
+        ]
+        sorted_keywords += [
+            keyword for keyword in self.sections if keyword not in sorted_keywords
         ]
 
-        for section in sorted_sections:
+        for keyword in sorted_keywords:
+            if not self.sections.is_loaded(keyword):
+                # Sections which are not parsed yet are printed as they are
+                span = self.sections.get_span(keyword)
+                if span.hcomment:
+                    eds_str += "\n" + "\n".join(
+                        f"$ {line.strip()}" for line in span.hcomment.splitlines()
+                    )
+                eds_str += "\n" + span.text().rstrip() + "\n"
+                continue
+
+            section = self.sections[keyword]
             if section.hcomment:
                 eds_str += "\n" + "\n".join(
                     f"$ {line.strip()}" for line in section.hcomment.splitlines()
@@ -564,18 +788,442 @@ class EDS:
         return eds_str
 
 
+class Transaction:
+    """
+    Batch of changes of an EDS made by set_value, add_section, add_entry,
+    add_field, remove_section and remove_entry in a with block:
+
+        with eds.transaction():
+            eds.set_value("Device", "ProdName", 0, "Variant")
+            eds.remove_entry("Params", "Param12", removetree=True)
+
+    The changes are checked when the block ends. Each changed field value is
+    checked once against the data types of the field. In a validated EDS the
+    added sections, entries and fields are validated and the references of the
+    changed fields and to the removed entries are checked. If a check fails or
+    the block raises an exception, all changes are rolled back.
+    """
+
+    def __init__(self, eds):
+        self.eds = eds
+        self.undo_log = []  # Functions undoing the structural changes in order
+        # Fields changed by set_value: (entry, data, raw_value, deferred type)
+        self.values = {}
+        self.added = []  # Added sections, entries and fields: (section, entry, field)
+        self.removed_sections = []
+        self.removed_entries = []
+
+    def __enter__(self):
+        if self.eds.active_transaction is not None:
+            raise Exception("A transaction of the EDS is already active!")
+        self.eds.active_transaction = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.eds.active_transaction = None
+        if exc_type is not None:
+            self.rollback()
+            return False
+        try:
+            self.commit()
+        except Exception:
+            self.rollback()
+            raise
+        return False
+
+    def set_value(self, entry, field, value):
+        if field not in self.values:
+            self.values[field] = (entry, field._data, field.raw_value, field._type)
+        # The value is checked on commit
+        del field.data
+        field.raw_value = value
+        entry.parent.param_names = None
+
+    def section_added(self, section):
+        self.added.append((section, None, None))
+
+        def undo():
+            self.eds.sections.pop(section.keyword)
+            # The section is indexed by its validation on commit
+            self.eds.unindex_section(section)
+
+        self.undo_log.append(undo)
+
+    def entry_added(self, entry):
+        section = entry.parent
+        self.added.append((section, entry, None))
+
+        def undo():
+            section.remove_entry(entry.keyword)
+            entry.fields.clear()
+
+        self.undo_log.append(undo)
+
+    def field_added(self, entry, field):
+        self.added.append((entry.parent, entry, field))
+
+        def undo():
+            entry.fields.pop()
+            entry.field_indexes = None
+            entry.clear_hashes()
+            entry.parent.param_names = None
+
+        self.undo_log.append(undo)
+
+    def section_removed(self, section):
+        sections = self.eds.sections
+        position = list(sections).index(section.keyword)
+        indexed = self.eds.sections_by_class_id.get(section.class_id) is section
+        self.removed_sections.append(section)
+
+        def undo():
+            sections.splice(position, position, [section])
+            if indexed:
+                self.eds.sections_by_class_id[section.class_id] = section
+
+        self.undo_log.append(undo)
+
+    def entry_removed(self, section, entry):
+        position = list(section.entries).index(entry.keyword)
+        self.removed_entries.append(entry)
+        self.undo_log.append(lambda: section.insert_entry(position, entry))
+
+    def commit(self):
+        eds = self.eds
+        # Check each changed value once by setting it with its previous data
+        for field, (entry, data, raw_value, data_type) in self.values.items():
+            value = field.raw_value
+            field._data = data
+            field.raw_value = raw_value
+            field._type = data_type
+            field.value = value
+
+        if eds.validated:
+            self.validate()
+
+        # Release the fields of the removed entries
+        for section in self.removed_sections:
+            if not section.shared:
+                self.removed_entries.extend(section.entries.values())
+        for entry in self.removed_entries:
+            if not entry.shared:
+                entry.fields.clear()
+
+    def validate(self):
+        """
+        Validates the added objects and checks the references of the changed
+        fields and to the removed entries.
+        """
+        eds = self.eds
+        # Ordered sets of the added sections and entries
+        added_sections = dict.fromkeys(
+            section for section, entry, _ in self.added if entry is None
+        )
+        added_entries = dict.fromkeys(
+            entry
+            for section, entry, field in self.added
+            if entry is not None and field is None and section not in added_sections
+        )
+        added_fields = [
+            (section, entry, field)
+            for section, entry, field in self.added
+            if field is not None
+            and section not in added_sections
+            and entry not in added_entries
+        ]
+        for section in added_sections:
+            eds.validate_section(section)
+        for entry in added_entries:
+            eds.validate_entry(entry.parent, entry)
+        for section, entry, field in added_fields:
+            eds.validate_field(section, entry, field.index, field)
+
+        # Fields which references are checked
+        fields = [
+            (entry.parent, entry, field)
+            for field, (entry, _, _, _) in self.values.items()
+        ]
+        fields.extend(added_fields)
+        entries = [
+            entry for section in added_sections for entry in section.entries.values()
+        ]
+        entries.extend(added_entries)
+        fields.extend(
+            (entry.parent, entry, field) for entry in entries for field in entry.fields
+        )
+
+        errors = []
+        for section, entry, field in fields:
+            error = eds.check_reference(section, entry, field)
+            if error:
+                errors.append(error)
+
+        # Fields referring to the removed entries
+        removed = {entry.keyword for entry in self.removed_entries}
+        for section in self.removed_sections:
+            removed.update(section.entries)
+        if removed:
+            for section in eds.sections.loaded():
+                for entry in section.entries.values():
+                    for field in entry.fields:
+                        value = field.value
+                        if isinstance(value, str) and value in removed:
+                            error = eds.check_reference(section, entry, field)
+                            if error:
+                                errors.append(error)
+        if errors:
+            raise Exception("Unable to commit the transaction! " + " ".join(errors))
+
+    def rollback(self):
+        for field, (entry, data, raw_value, data_type) in self.values.items():
+            field._data = data
+            field.raw_value = raw_value
+            field._type = data_type
+            entry.parent.param_names = None
+            entry.clear_hashes()
+        for undo in reversed(self.undo_log):
+            undo()
+
+
+class SectionSpan:
+    """
+    Section which is not parsed yet. The section text is eds_data[start:end],
+    starting at the section keyword. line_number is the line of the keyword.
+    """
+
+    def __init__(self, eds_data, keyword, start, end, line_number=0, hcomment=""):
+        self.eds_data = eds_data
+        self.keyword = keyword
+        self.start = start
+        self.end = end
+        self.line_number = line_number
+        self.hcomment = hcomment
+
+    def text(self):
+        text = self.eds_data[self.start : self.end]
+        if isinstance(text, str):
+            return text
+        return str(text, "ascii")
+
+    def __repr__(self):
+        return f"SECTIONSPAN({self.keyword}, {self.start}:{self.end})"
+
+
+class LazySections(dict):
+    """
+    Sections of an EDS by their keywords. A section can also be added as a
+    SectionSpan which is parsed by loader(span) the first time the section is
+    looked up. Checking for keywords and iterating over them parses nothing,
+    values() and items() parse all remaining sections.
+    on_load(section) is called after a section has been parsed.
+    """
+
+    def __init__(self, loader=None, on_load=None):
+        super().__init__()
+        self.loader = loader
+        self.on_load = on_load
+
+    def add_span(self, span):
+        if span.keyword in self:
+            raise Exception(f"Duplicate section! [{span.keyword}]")
+        dict.__setitem__(self, span.keyword, span)
+
+    def is_loaded(self, section_keyword):
+        return not isinstance(dict.get(self, section_keyword), SectionSpan)
+
+    def get_span(self, section_keyword):
+        span = dict.get(self, section_keyword)
+        if isinstance(span, SectionSpan):
+            return span
+        return None
+
+    def load(self, section_keyword):
+        section = self.loader(dict.__getitem__(self, section_keyword))
+        dict.__setitem__(self, section_keyword, section)
+        if self.on_load is not None:
+            self.on_load(section)
+        return section
+
+    def load_all(self):
+        for section_keyword in list(self):
+            if not self.is_loaded(section_keyword):
+                self.load(section_keyword)
+
+    def loaded(self):
+        """
+        Returns a list of the sections which are already parsed.
+        """
+        return [
+            section
+            for section in dict.values(self)
+            if not isinstance(section, SectionSpan)
+        ]
+
+    def __getitem__(self, section_keyword):
+        section = dict.__getitem__(self, section_keyword)
+        if isinstance(section, SectionSpan):
+            return self.load(section_keyword)
+        return section
+
+    def get(self, section_keyword, default=None):
+        section = dict.get(self, section_keyword, default)
+        if isinstance(section, SectionSpan):
+            return self.load(section_keyword)
+        return section
+
+    def values(self):
+        self.load_all()
+        return dict.values(self)
+
+    def items(self):
+        self.load_all()
+        return dict.items(self)
+
+    def offset(self, section_keyword):
+        """
+        Returns the offset of a section in the eds data without parsing it.
+        """
+        section = dict.__getitem__(self, section_keyword)
+        if isinstance(section, SectionSpan):
+            return section.start
+        return section.offset
+
+    def hcomment(self, section_keyword):
+        return dict.__getitem__(self, section_keyword).hcomment
+
+    def set_hcomment(self, section_keyword, hcomment):
+        section = dict.__getitem__(self, section_keyword)
+        section.hcomment = hcomment
+
+    def shift(self, section_keyword, offset, lines):
+        """
+        Moves a section or span by offset characters and lines in the eds data.
+        """
+        section = dict.__getitem__(self, section_keyword)
+        if isinstance(section, SectionSpan):
+            section.start += offset
+            section.end += offset
+            section.line_number += lines
+        else:
+            section.shift(offset, lines)
+
+    def set_eds_data(self, eds_data):
+        for section in dict.values(self):
+            if isinstance(section, SectionSpan):
+                section.eds_data = eds_data
+
+    def splice(self, start, stop, sections):
+        """
+        Replaces the sections from position start to stop by a list of sections,
+        keeping the order of the sections.
+        """
+        items = list(dict.items(self))
+        items[start:stop] = [(section.keyword, section) for section in sections]
+        dict.clear(self)
+        dict.update(self, items)
+
+
+def content_digest(data):
+    """
+    Digest of the content hashes of sections, entries and fields.
+    """
+    return blake2b(data, digest_size=16).digest()
+
+
+# Index of the Parameter Name field of a ParamN entry
+PARAM_NAME_FIELD = 6
+
+
+def entry_number(entry_keyword):
+    """
+    Splits the keyword of an enumerated entry into its prefix and number, e.g.
+    ("Param", 12) for Param12.
+    """
+    prefix = entry_keyword.rstrip(digits)
+    return prefix, int(entry_keyword[len(prefix) :])
+
+
+def comment_property(slot):
+    """
+    Property of a comment kept in slot. Setting the comment drops the content
+    hashes which include it.
+    """
+
+    def set(self, comment):
+        setattr(self, slot, comment)
+        self.clear_hashes()
+
+    return property(attrgetter(slot), set)
+
+
 class Section:
+    __slots__ = (
+        "parent",
+        "keyword",
+        "name",
+        "class_id",
+        "line_number",
+        "entries",
+        "_hcomment",
+        "_fcomment",
+        "offset",
+        "numbered_entries",
+        "param_names",
+        "shared",
+        "digests",
+    )
+
     def __init__(self, eds, keyword, name, class_id=0, line_number=0):
         self.parent = eds
-        self.keyword = keyword
-        self.name = name
+        self.keyword = intern(keyword)
+        self.name = intern(name)
         self.class_id = class_id
         self.line_number = (
             line_number  # line number in the eds data. required for comment assignment
         )
         self.entries = {}
-        self.hcomment = ""
-        self.fcomment = ""
+        self._hcomment = ""
+        self._fcomment = ""
+        self.offset = None  # offset of the keyword in the eds data
+        self.numbered_entries = {}  # Enumerated entries by (prefix, number)
+        self.param_names = None  # Entries by Parameter Name, built on demand
+        self.shared = False  # Shared with clones of the EDS, see EDS.clone
+        self.digests = None  # Content hashes without and with comments
+
+    hcomment = comment_property("_hcomment")
+    fcomment = comment_property("_fcomment")
+
+    def clear_hashes(self):
+        """
+        Drops the content hashes of the section after a change.
+        """
+        self.digests = None
+
+    def copy(self, eds):
+        """
+        Returns a copy of the section in eds which shares the entries.
+        """
+        section = Section(eds, self.keyword, self.name, self.class_id, self.line_number)
+        section.entries = dict(self.entries)
+        section.numbered_entries = dict(self.numbered_entries)
+        section.hcomment = self.hcomment
+        section.fcomment = self.fcomment
+        section.offset = self.offset
+        for entry in self.entries.values():
+            entry.shared = True
+        return section
+
+    def shift(self, offset, lines):
+        """
+        Moves the section by offset characters and lines in the eds data.
+        """
+        self.offset += offset
+        if lines:
+            self.line_number += lines
+            for entry in self.entries.values():
+                entry.line_number += lines
+                for field in entry.fields:
+                    field.line_number += lines
 
     def add_entry(self, entry_keyword, line_number=0):
         if entry_keyword == "":
@@ -587,7 +1235,39 @@ class Section:
         entry_name = entry_keyword  # using entry keyword as the default entry name
         entry = Entry(self, entry_keyword, entry_name, line_number)
         self.entries[entry_keyword] = entry
+        if entry_keyword[-1] in digits:
+            self.numbered_entries[entry_number(entry_keyword)] = entry
+        self.param_names = None
+        self.digests = None
+
+        return entry
+
+    def replace_entry(self, entry):
+        """
+        Replaces the entry with the keyword of entry, keeping its position.
+        """
+        self.entries[entry.keyword] = entry
+        if entry.keyword[-1] in digits:
+            self.numbered_entries[entry_number(entry.keyword)] = entry
+        self.param_names = None
+        self.digests = None
+        return entry
 
+    def insert_entry(self, position, entry):
+        """
+        Inserts an entry at a position of the entries.
+        """
+        entries = list(self.entries.items())
+        entries.insert(position, (entry.keyword, entry))
+        self.entries = dict(entries)
+        return self.replace_entry(entry)
+
+    def remove_entry(self, entry_keyword):
+        entry = self.entries.pop(entry_keyword)
+        if entry_keyword[-1] in digits:
+            self.numbered_entries.pop(entry_number(entry_keyword), None)
+        self.param_names = None
+        self.digests = None
         return entry
 
     def has_entry(self, entry_keyword=None, entryindex=None):
@@ -598,6 +1278,25 @@ class Section:
     def get_entry(self, entry_keyword):
         return self.entries.get(entry_keyword)
 
+    def get_entry_bynumber(self, prefix, number):
+        """
+        To get an enumerated entry by its keyword prefix and number, e.g.
+        ("Assem", 3) for Assem3.
+        """
+        return self.numbered_entries.get((prefix, number))
+
+    def get_entry_byparamname(self, param_name):
+        """
+        To get a ParamN entry by the value of its Parameter Name field.
+        """
+        if self.param_names is None:
+            self.param_names = {}
+            for (prefix, _), entry in self.numbered_entries.items():
+                if prefix == "Param" and len(entry.fields) > PARAM_NAME_FIELD:
+                    name = entry.fields[PARAM_NAME_FIELD].value
+                    self.param_names.setdefault(name, entry)
+        return self.param_names.get(param_name)
+
     def get_field(self, entry_keyword, field_index):
         """
         To get a section.entry.field using the entry name + (ield name or field index.
@@ -613,6 +1312,25 @@ class Section:
             return field.value
         return None
 
+    def content_hash(self, comments=True):
+        """
+        Returns a digest of the keyword and the entries of the section. Comments
+        are left out if comments is False. The digest is kept until the section
+        or one of its entries changes.
+        """
+        if self.digests is None:
+            self.digests = [None, None]
+        digest = self.digests[comments]
+        if digest is None:
+            parts = [self.keyword.encode(), b"\0"]
+            parts.extend(
+                entry.content_hash(comments) for entry in self.entries.values()
+            )
+            if comments:
+                parts.append(f"\0{self.hcomment}\0{self.fcomment}".encode())
+            digest = self.digests[comments] = content_digest(b"".join(parts))
+        return digest
+
     def list(self, indent=0):
         print("".ljust(indent, " ") + self.__repr__())
         for key, entry in self.entries.items():
@@ -626,46 +1344,110 @@ class Section:
 
 
 class Entry:
+    __slots__ = (
+        "parent",
+        "keyword",
+        "name",
+        "line_number",
+        "fields",
+        "_hcomment",
+        "_fcomment",
+        "field_indexes",
+        "shared",
+        "digests",
+    )
 
     def __init__(self, section, keyword, name, line_number=0):
         self.parent = section
-        self.keyword = keyword
-        self.name = name
+        self.keyword = intern(keyword)
+        self.name = self.keyword if name == keyword else intern(name)
         self.line_number = (
             line_number  # line number in the eds data. required for comment assignment
         )
         self.fields = (
             []
         )  # Unlike the sections and entries, fields are implemented as a list.
-        self.hcomment = ""
-        self.fcomment = ""
+        if section is not None and section.parent is not None:
+            field_columns = section.parent.field_columns
+            if field_columns is not None:
+                self.fields = FieldRows(field_columns, self)
+        self.field_indexes = None  # Field indexes by normalized name, built on demand
+        self.shared = False  # Shared with clones of the EDS, see EDS.clone
+        self.digests = None  # Content hashes without and with comments
+        self._hcomment = ""
+        self._fcomment = ""
+
+    hcomment = comment_property("_hcomment")
+    fcomment = comment_property("_fcomment")
+
+    def copy(self, section):
+        """
+        Returns a copy of the entry and its fields in section.
+        """
+        entry = Entry(section, self.keyword, self.name, self.line_number)
+        entry.hcomment = self.hcomment
+        entry.fcomment = self.fcomment
+        for field in self.fields:
+            entry.fields.append(field.copy(entry))
+        return entry
 
     def add_field(self, field_value, field_data_type=None, line_number=0):
         field_data_object = None  # This going to be an instance of CIP_TYPE
-        field_name = f"field{len(self.fields)}"
+        field_name = default_field_name(len(self.fields))
 
         if field_data_type:
             field_data_object = field_data_type(field_value)
-        elif field_value == "":
-            field_data_object = eds_types.EMPTY(field_value)
-        elif eds_types.VENDOR_SPECIFIC.validate(field_value):
-            field_data_object = eds_types.VENDOR_SPECIFIC(field_value)
         else:
-            field_data_object = eds_types.UNDEFINED(field_value)
+            field_data_object = untyped_data(field_value)
 
         field = Field(
             self, field_name, field_data_object, len(self.fields), line_number
         )
         self.fields.append(field)
+        self.field_indexes = None
+        self.parent.param_names = None
+        self.clear_hashes()
 
+        return self.fields[-1]
+
+    def append_field(self, field_value, line_number=0):
+        """
+        Parser's fast path to add a field. The data type object of the field is
+        created on validation or on first access.
+        """
+        self.field_indexes = None
+        if self.digests is not None:
+            self.clear_hashes()
+        if type(self.fields) is FieldRows:
+            return self.fields.append_value(field_value, line_number)
+        index = len(self.fields)
+        field = Field(
+            self, default_field_name(index), None, index, line_number, field_value
+        )
+        self.fields.append(field)
         return field
 
+    def get_field_index(self, field_name):
+        """
+        Returns the index of a field by its name. Spaces and case are ignored.
+        """
+        if self.field_indexes is None:
+            self.field_indexes = {}
+            for field in self.fields:
+                self.field_indexes.setdefault(
+                    field.name.replace(" ", "").lower(), field.index
+                )
+        return self.field_indexes.get(field_name.replace(" ", "").lower())
+
+    def get_field_byname(self, field_name):
+        field_index = self.get_field_index(field_name)
+        if field_index is None:
+            return None
+        return self.fields[field_index]
+
     def has_field(self, field):
         if isinstance(field, str):  # field name
-            fieldname = field.replace(" ", "").lower()
-            for field in self.fields:
-                if fieldname == field.name.replace(" ", "").lower():
-                    return True
+            return self.get_field_index(field) is not None
         elif isinstance(field, numbers.Number):  # field index
             return field < len(self.fields)
         else:
@@ -693,6 +1475,32 @@ class Entry:
             pass
         return value
 
+    def content_hash(self, comments=True):
+        """
+        Returns a digest of the keyword and the fields of the entry. Comments
+        are left out if comments is False. The digest is kept until the entry
+        or one of its fields changes.
+        """
+        if self.digests is None:
+            self.digests = [None, None]
+        digest = self.digests[comments]
+        if digest is None:
+            parts = [self.keyword.encode(), b"\0"]
+            parts.extend(field.content_hash(comments) for field in self.fields)
+            if comments:
+                parts.append(f"\0{self.hcomment}\0{self.fcomment}".encode())
+            digest = self.digests[comments] = content_digest(b"".join(parts))
+        return digest
+
+    def clear_hashes(self):
+        """
+        Drops the content hashes of the entry and its section after a change.
+        """
+        if self.digests is not None:
+            self.digests = None
+            if self.parent is not None:
+                self.parent.digests = None
+
     def list(self, indent=0):
         print("".ljust(indent, " ") + self.__repr__())
         for field in self.fields:
@@ -713,41 +1521,134 @@ class Entry:
         return f"ENTRY({self.name})"
 
 
+# Interned default names of the fields by index: "field0", "field1", ...
+FIELD_NAMES = [intern(f"field{index}") for index in range(32)]
+
+
+def default_field_name(index):
+    if index >= len(FIELD_NAMES):
+        FIELD_NAMES.extend(
+            intern(f"field{index}") for index in range(len(FIELD_NAMES), index + 1)
+        )
+    return FIELD_NAMES[index]
+
+
+def untyped_data(field_value):
+    """
+    Data type object of a field value without a known data type.
+    """
+    if field_value == "":
+        return eds_types.EMPTY(field_value)
+    if eds_types.VENDOR_SPECIFIC.validate(field_value):
+        return eds_types.VENDOR_SPECIFIC(field_value)
+    return eds_types.UNDEFINED(field_value)
+
+
 class Field:
-    def __init__(self, entry, name, data, index, line_number=0):
+    __slots__ = (
+        "index",
+        "parent",
+        "name",
+        "line_number",
+        "_data",
+        "raw_value",
+        "_type",
+        "data_types",
+        "_hcomment",
+        "_fcomment",
+    )
+
+    def __init__(self, entry, name, data, index, line_number=0, raw_value=None):
         self.index = index
         self.parent = entry
         self.name = name
         self.line_number = (
             line_number  # line number in the eds data. required for comment assignment
         )
-        self.data = data  # datatype object. Actually is the Field value containing also its type information
-        self.data_types = []  # Valid datatypes a field supports
-        self.hcomment = ""
-        self.fcomment = ""
+        self._data = data  # datatype object. Actually is the Field value containing also its type information
+        self.raw_value = raw_value  # Parsed value of a field without data object yet
+        self._type = None  # Data type of raw_value recorded by a deferred validation
+        self.data_types = ()  # Valid datatypes a field supports, set on validation
+        self._hcomment = ""
+        self._fcomment = ""
+
+    hcomment = comment_property("_hcomment")
+    fcomment = comment_property("_fcomment")
+
+    def clear_hashes(self):
+        """
+        Drops the content hashes of the entry and the section of the field,
+        which include the field, after a change.
+        """
+        if self.parent is not None:
+            self.parent.clear_hashes()
+
+    @property
+    def data(self):
+        if self._data is None and self.raw_value is not None:
+            data_type = self._type
+            if data_type is None:
+                self._data = untyped_data(self.raw_value)
+            else:
+                # The raw value was validated for the data type
+                data_types = self.data_types
+                self._type = None
+                self._data = data_type.from_valid(
+                    self.raw_value,
+                    data_types.get(data_type.__name__) if data_types else None,
+                )
+                self.raw_value = None
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._type = None
+        self._data = data
+        self.raw_value = None
+        self.parent.clear_hashes()
+
+    @data.deleter
+    def data(self):
+        self._type = None
+        self._data = None
+        self.raw_value = None
+        self.parent.clear_hashes()
+
+    def defer_type(self, data_type):
+        """
+        Records the data type which the raw value of the field was validated
+        for. The data type object is created on the first access of data or
+        value.
+        """
+        self._type = data_type
 
     @property
     def value(self):
+        if self._data is None and self.raw_value is not None and self._type is None:
+            return self.raw_value
         return self.data.value
 
     @value.setter
     def value(self, value):
+        self.parent.parent.param_names = None
         if isinstance(self.data, eds_types.EMPTY) or isinstance(
             self.data, eds_types.UNDEFINED
         ):
             if type(self.data).validate(value, self.data.range):
-                self.data.value = value
+                self.data = type(self.data)(value)
                 return
         # Setting with the actual datatype is failed. Try other supported types.
+        # data_types holds the type names and ranges from the reference database.
         if self.data_types:
-            for datatype, valid_data in self.data_types:
-                if datatype.validate(value, valid_data):
+            for type_name, valid_data in self.data_types.items():
+                datatype = getattr(eds_types, type_name, None)
+                if datatype is not None and datatype.validate(value, valid_data):
                     del self.data
                     self.data = datatype(value, valid_data)
                     return
         types_str = ", ".join(
-            f"<{datatype.__name__}>{valid_data}"
-            for datatype, valid_data in self.data_types
+            f"<{type_name}>{valid_data}"
+            for type_name, valid_data in dict(self.data_types).items()
         )
         raise Exception(
             "Unable to set Field value! Data_type mismatch!"
@@ -760,10 +1661,47 @@ class Field:
             )
         )
 
+    def content_hash(self, comments=True):
+        """
+        Returns a digest of the value of the field as it is saved. Comments are
+        left out if comments is False.
+        """
+        data = self._data
+        if data is None and self._type is not None:
+            data = self.data
+        if data is None:
+            text = "" if self.raw_value is None else str(self.raw_value)
+        else:
+            text = str(data)
+        if comments:
+            text = f"{text}\0{self.hcomment}\0{self.fcomment}"
+        return content_digest(text.encode())
+
+    def copy(self, entry):
+        """
+        Returns a copy of the field in entry. The data type object is shared,
+        a new value replaces it.
+        """
+        field = Field(
+            entry, self.name, self._data, self.index, self.line_number, self.raw_value
+        )
+        field._type = self._type
+        field.data_types = self.data_types
+        field.hcomment = self.hcomment
+        field.fcomment = self.fcomment
+        return field
+
     @property
     def datatype(self):
         return (type(self.data), self.data.range)
 
+    @property
+    def data_type(self):
+        """
+        Class of the data type object, without creating a deferred one.
+        """
+        return self._type or type(self.data)
+
     def __str__(self):
         data = '""' if self.data is None else self.data
         return str(data)
@@ -783,49 +1721,493 @@ class Field:
         )
 
 
-class EDS_RefDatabase:
+def column_property(column):
+    def get(self):
+        return getattr(self.columns, column)[self.row]
+
+    def set(self, value):
+        getattr(self.columns, column)[self.row] = value
+
+    return property(get, set)
+
+
+def sparse_column_property(column, default):
+    def get(self):
+        return getattr(self.columns, column).get(self.row, default)
+
+    def set(self, value):
+        values = getattr(self.columns, column)
+        if value == default:
+            values.pop(self.row, None)
+        else:
+            values[self.row] = value
+        # The sparse columns hold the comments, see comment_property
+        self.clear_hashes()
+
+    return property(get, set)
+
+
+class FieldView(Field):
+    """
+    Field of an EDS with columnar storage. A view is created on each access of
+    a field. Its attributes are read from and written to the columns of its
+    row in the FieldColumns.
+    """
+
+    __slots__ = ("columns", "row")
+
+    def __init__(self, columns, row):
+        self.columns = columns
+        self.row = row
+
+    index = column_property("indexes")
+    line_number = column_property("line_numbers")
+    raw_value = column_property("raw_values")
+    data_types = column_property("data_types")
+
+    @property
+    def _type(self):
+        columns = self.columns
+        if columns.data[self.row] is not None:
+            return None
+        return columns.types[columns.type_codes[self.row]]
+
+    @_type.setter
+    def _type(self, data_type):
+        self.columns.set_type(self.row, data_type)
+
+    hcomment = sparse_column_property("hcomments", "")
+    fcomment = sparse_column_property("fcomments", "")
+
+    @property
+    def parent(self):
+        return self.columns.entries[self.columns.entry_ids[self.row]]
+
+    @property
+    def name(self):
+        name = self.columns.names[self.row]
+        if name is None:
+            return default_field_name(self.columns.indexes[self.row])
+        return name
+
+    @name.setter
+    def name(self, name):
+        self.columns.names[self.row] = name
+
+    @property
+    def _data(self):
+        return self.columns.data[self.row]
+
+    @_data.setter
+    def _data(self, data):
+        self.columns.set_data(self.row, data)
+
+    def __eq__(self, other):
+        if type(other) is FieldView:
+            return self.columns is other.columns and self.row == other.row
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.columns), self.row))
+
+
+class FieldRows:
+    """
+    Fields of an entry in an EDS with columnar storage. Behaves like the list of
+    Field objects of an entry. Holds the row numbers of the fields and returns a
+    FieldView for each access. A Field object stored into the list is copied
+    into a new row, a field of the list is found by its row.
+    """
+
+    __slots__ = ("columns", "entry_id", "rows")
+
+    def __init__(self, columns, entry):
+        self.columns = columns
+        self.entry_id = columns.add_entry(entry)
+        self.rows = array("I")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FieldView(self.columns, row) for row in self.rows[index]]
+        return FieldView(self.columns, self.rows[index])
+
+    def __iter__(self):
+        columns = self.columns
+        for row in self.rows:
+            yield FieldView(columns, row)
+
+    def __setitem__(self, index, field):
+        if isinstance(index, slice):
+            rows = self.rows[index]
+            new_rows = [self.add_row(item) for item in field]
+            if index.step not in (None, 1) and len(new_rows) != len(rows):
+                self.columns.release(new_rows)
+                raise ValueError(
+                    f"attempt to assign sequence of size {len(new_rows)} "
+                    f"to extended slice of size {len(rows)}"
+                )
+            self.rows[index] = array("I", new_rows)
+            self.columns.release(rows)
+            return
+        row = self.rows[index]
+        self.rows[index] = self.add_row(field)
+        self.columns.release([row])
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            rows = self.rows[index]
+        else:
+            rows = [self.rows[index]]
+        del self.rows[index]
+        self.columns.release(rows)
+
+    def __contains__(self, field):
+        return self.row_of(field) in self.rows
+
+    def row_of(self, field):
+        """
+        Returns the row of a field of the columns, None for other fields.
+        """
+        if isinstance(field, FieldView) and field.columns is self.columns:
+            return field.row
+        return None
+
+    def index(self, field):
+        row = self.row_of(field)
+        if row is None or row not in self.rows:
+            raise ValueError("Field is not in the fields of the entry")
+        return self.rows.index(row)
+
+    def append(self, field):
+        """
+        Adds a row with the attributes of a Field object.
+        """
+        self.rows.append(self.add_row(field))
+
+    def insert(self, index, field):
+        self.rows.insert(index, self.add_row(field))
+
+    def remove(self, field):
+        del self[self.index(field)]
+
+    def add_row(self, field):
+        """
+        Adds a row with the attributes of a Field object and returns it.
+        """
+        row = self.columns.add_row(
+            self.entry_id, field.index, field.line_number, field.raw_value
+        )
+        view = FieldView(self.columns, row)
+        view.name = field.name
+        if field._data is not None:
+            view._data = field._data
+        view._type = field._type
+        view.data_types = field.data_types
+        view.hcomment = field.hcomment
+        view.fcomment = field.fcomment
+        return row
+
+    def append_value(self, field_value, line_number=0):
+        """
+        Adds a row for a parsed field value. See Entry.append_field.
+        """
+        row = self.columns.add_row(
+            self.entry_id, len(self.rows), line_number, field_value
+        )
+        self.rows.append(row)
+        return FieldView(self.columns, row)
+
+    def pop(self, index=-1):
+        row = self.rows.pop(index)
+        self.columns.release([row])
+        return FieldView(self.columns, row)
+
+    def clear(self):
+        self.columns.release(self.rows)
+        del self.rows[:]
+
+
+class FieldColumns:
+    """
+    Columnar storage of all fields of an EDS. Each field is a row of the
+    columns:
+        entry_ids     id of the entry of the field, see entries
+        indexes       index of the field in its entry
+        line_numbers  line of the field in the EDS data
+        raw_values    parsed value as long as the field has no data type object
+        names         field name, None for the default name fieldN
+        data          data type object of the field or None
+        data_types    valid data types of the field, set on validation
+        type_codes    code of the data type, see types. 0 for untyped fields.
+                      Set without data for a deferred data type
+        numbers       numeric value of a field with a numeric data type, NaN
+                      for all other fields
+    The comments are only kept for the rows that have them. The rows of
+    removed fields are released and their entry id is set to RELEASED. Bulk
+    operations run over the columns without creating Field objects.
+    """
+
+    RELEASED = 0xFFFFFFFF
+
+    def __init__(self):
+        self.entries = []  # Entries by entry id
+        self.entry_ids = array("I")
+        self.indexes = array("H")
+        self.line_numbers = array("I")
+        self.raw_values = []
+        self.names = []
+        self.data = []
+        self.type_codes = array("B")
+        self.numbers = array("d")
+        self.data_types = []
+        self.hcomments = {}
+        self.fcomments = {}
+        self.types = [None]  # Data type classes by type code
+        self.type_codes_by_type = {}
+
+    def __len__(self):
+        return len(self.entry_ids)
+
+    def add_entry(self, entry):
+        self.entries.append(entry)
+        return len(self.entries) - 1
+
+    def add_row(self, entry_id, index, line_number, raw_value):
+        self.entry_ids.append(entry_id)
+        self.indexes.append(index)
+        self.line_numbers.append(line_number)
+        self.raw_values.append(raw_value)
+        self.names.append(None)
+        self.data.append(None)
+        self.data_types.append(())
+        self.type_codes.append(0)
+        self.numbers.append(math.nan)
+        return len(self.entry_ids) - 1
+
+    def type_code(self, data_type):
+        type_code = self.type_codes_by_type.get(data_type)
+        if type_code is None:
+            type_code = len(self.types)
+            self.types.append(data_type)
+            self.type_codes_by_type[data_type] = type_code
+        return type_code
+
+    def set_data(self, row, data):
+        self.data[row] = data
+        if data is None:
+            self.type_codes[row] = 0
+            self.numbers[row] = math.nan
+            return
+        self.type_codes[row] = self.type_code(type(data))
+        value = data.value
+        if isinstance(value, numbers.Real):
+            self.numbers[row] = value
+        else:
+            self.numbers[row] = math.nan
+
+    def set_type(self, row, data_type):
+        """
+        Records the deferred data type of a row without data, see
+        Field.defer_type.
+        """
+        if self.data[row] is not None:
+            return
+        if data_type is None:
+            self.type_codes[row] = 0
+            self.numbers[row] = math.nan
+            return
+        self.type_codes[row] = self.type_code(data_type)
+        if issubclass(data_type, eds_types.CIP_EDS_BASE_INT):
+            self.numbers[row] = eds_types.getnumber(self.raw_values[row])
+
+    def release(self, rows):
+        for row in rows:
+            self.entry_ids[row] = self.RELEASED
+            self.raw_values[row] = None
+            self.data[row] = None
+            self.data_types[row] = ()
+            self.hcomments.pop(row, None)
+            self.fcomments.pop(row, None)
+
+    def release_section(self, section):
+        """
+        Releases the rows of a removed section. Sections and entries shared
+        with clones of the EDS keep their rows.
+        """
+        if section.shared:
+            return
+        for entry in section.entries.values():
+            if not entry.shared:
+                self.release(entry.fields.rows)
+
+    def value(self, row):
+        data = self.data[row]
+        if data is None:
+            if self.type_codes[row]:
+                return FieldView(self, row).value
+            return self.raw_values[row]
+        return data.value
+
+    def live_rows(self):
+        """
+        Returns the rows of the fields which are part of the EDS.
+        """
+        released = self.RELEASED
+        return [row for row, entry_id in enumerate(self.entry_ids) if entry_id != released]
+
+    def rows_of_type(self, data_type):
+        """
+        Returns the rows of the fields which data type object is a data_type.
+        """
+        type_code = self.type_codes_by_type.get(data_type)
+        if type_code is None:
+            return []
+        return [row for row, code in enumerate(self.type_codes) if code == type_code]
+
+
+# Field values up to FIELD_TYPE_KEY_LENGTH chars are cached by get_field_type,
+# up to FIELD_TYPE_CACHE_SIZE values
+FIELD_TYPE_KEY_LENGTH = 32
+FIELD_TYPE_CACHE_SIZE = 65536
+
+
+class EDS_RefLibrary:
+    """
+    The reference libraries of the references directory. The libraries are
+    loaded once per process, see shared_ref_library, and shared by all EDS
+    objects and threads. They must not be changed. The libraries are read
+    from a cache if it is up to date, see eds_references.load_references.
+    """
+
     def __init__(self):
         self.multi_protocol_db = {}
         self.meta_db = {}
         self.common_object_db = {}
-        self.protocol = None  # Default: Generic
-        self.protocol_db = {}
-
-        ref_dir = Path(__file__).parent / "references"
-        json_files = [f for f in ref_dir.iterdir() if f.suffix == ".json"]
 
-        if not json_files:
+        libraries = load_references()
+        if not libraries:
             logger.warning(
                 "Found no reference Databases! Semantic checking cannot be performed."
             )
 
-        for file in json_files:
-            with file.open("r", encoding="utf-8") as src:
-                data = json.loads(src.read())
-                if (
-                    data.get("project", None) == "eds_pie"
-                    and data["lib_name"] == "MetaEDS"
-                ):
-                    self.meta_db = data
-                elif (
-                    data.get("project", None) == "eds_pie"
-                    and data["lib_name"] == "Common Object Class"
-                ):
-                    self.common_object_db = data
-                elif (
-                    data.get("project", None) == "eds_pie"
-                    and file != "edslib_schema.json"
-                ):
-                    self.multi_protocol_db[data["lib_name"]] = data
+        for data in libraries:
+            if data["lib_name"] == "MetaEDS":
+                self.meta_db = data
+            elif data["lib_name"] == "Common Object Class":
+                self.common_object_db = data
+            else:
+                self.multi_protocol_db[data["lib_name"]] = data
         assert self.meta_db
         assert self.common_object_db
-        self.protocol_db = self.multi_protocol_db
+        # Data type classes by (id of the data types of a reference field,
+        # field value), see get_field_type
+        self.field_types = {}
+        # Section keywords by class ID of each protocol database
+        self.class_id_db = {
+            lib_name: {
+                section["class_id"]: section_keyword
+                for section_keyword, section in lib["sections"].items()
+                if section.get("class_id")
+            }
+            for lib_name, lib in self.multi_protocol_db.items()
+        }
+        # Databases accessed for each protocol, all for the generic protocol None
+        self.protocol_dbs = {None: self.multi_protocol_db}
+        for lib_name, lib in self.multi_protocol_db.items():
+            self.protocol_dbs[lib_name] = {lib_name: lib}
+
+    def __reduce__(self):
+        # An EDS sent to another process uses the libraries of that process
+        return (shared_ref_library, ())
+
+    def get_type(self, type_name):
+        return getattr(
+            __import__("eds_pie.cip_eds_types", fromlist=[type_name]), type_name, None
+        )
+
+    def get_field_type(self, data_types, field_value):
+        """
+        Returns the first data type class of the data_types of a reference field
+        which accepts the field value, None if there is none. The results for
+        short string values are cached, so a value is checked once per
+        reference field.
+        """
+        if not data_types:
+            return None
+        cached = type(field_value) is str and len(field_value) <= FIELD_TYPE_KEY_LENGTH
+        if cached:
+            key = (id(data_types), field_value)
+            data_type = self.field_types.get(key)
+            if data_type is not None:
+                return data_type
+        for type_name, type_meta in data_types.items():
+            if self.validate(type_name, type_meta, field_value):
+                data_type = self.get_type(type_name)
+                if cached and len(self.field_types) < FIELD_TYPE_CACHE_SIZE:
+                    self.field_types[key] = data_type
+                return data_type
+        return None
+
+    def validate(self, type_name, type_info, value):
+        dt = self.get_type(type_name)
+        if dt:
+            return dt.validate(value, type_info)
+        return False
+
+
+shared_library = None
+shared_library_lock = threading.Lock()
+
+
+def shared_ref_library():
+    """
+    Returns the EDS_RefLibrary of the process. It is loaded on the first call.
+    """
+    global shared_library
+    if shared_library is None:
+        with shared_library_lock:
+            if shared_library is None:
+                shared_library = EDS_RefLibrary()
+    return shared_library
+
+
+class EDS_RefDatabase:
+    """
+    Reference database access of an EDS. It holds the protocol selected for
+    the EDS, the reference libraries are shared, see EDS_RefLibrary.
+    """
+
+    def __init__(self, library=None):
+        self.library = shared_ref_library() if library is None else library
+        self.protocol = None  # Default: Generic
+
+    @property
+    def protocol_db(self):
+        return self.library.protocol_dbs[self.protocol]
+
+    @property
+    def multi_protocol_db(self):
+        return self.library.multi_protocol_db
+
+    @property
+    def meta_db(self):
+        return self.library.meta_db
+
+    @property
+    def common_object_db(self):
+        return self.library.common_object_db
+
+    @property
+    def class_id_db(self):
+        return self.library.class_id_db
 
     def set_protocol(self, protocol):
         if protocol in ["CompoNet", "ControlNet", "DeviceNet", "EtherNetIP"]:
             if protocol in self.multi_protocol_db:
                 self.protocol = protocol
-                self.protocol_db = {protocol: self.multi_protocol_db[protocol]}
                 logger.info(f"Protocol Database access restricted to {protocol}.")
             else:
                 logger.error(f'Requested Protocol Database "{protocol}" not available!')
@@ -836,7 +2218,6 @@ class EDS_RefDatabase:
 
     def reset_protocol(self):
         self.protocol = None
-        self.protocol_db = self.multi_protocol_db
         logger.info("Protocol Database access set to Generic.")
 
     def get_section(self, section_keyword):
@@ -858,10 +2239,10 @@ class EDS_RefDatabase:
         """
         To get a protocol specific EDS section_keyword by its CIP class ID
         """
-        for lib_name, lib in self.protocol_db.items():
-            for section in lib["sections"]:
-                if section["class_id"] == class_id:
-                    return section
+        for lib_name in self.protocol_db:
+            section_keyword = self.class_id_db[lib_name].get(class_id)
+            if section_keyword is not None:
+                return section_keyword
         return ""
 
     def get_section_name(self, section_keyword):
@@ -973,9 +2354,7 @@ class EDS_RefDatabase:
         return field
 
     def get_type(self, type_name):
-        return getattr(
-            __import__("eds_pie.cip_eds_types", fromlist=[type_name]), type_name, None
-        )
+        return self.library.get_type(type_name)
 
     def get_field_data_types(self, section_keyword, entry_keyword, field_index):
         field = self.get_field_byindex(section_keyword, entry_keyword, field_index)
@@ -995,17 +2374,18 @@ class EDS_RefDatabase:
         ref_field = self.get_field_byindex(section_keyword, entry_keyword, field_index)
         if ref_field is not None:
             ref_data_types = ref_field.get("data_types", {})
-
-            for type_name, type_meta in ref_data_types.items():
-                if self.validate(type_name, type_meta, field_value):
-                    return self.get_type(type_name)(field_value, type_meta)
+            data_type = self.get_field_type(ref_data_types, field_value)
+            if data_type is not None:
+                return data_type.from_valid(
+                    field_value, ref_data_types[data_type.__name__]
+                )
         return None
 
+    def get_field_type(self, data_types, field_value):
+        return self.library.get_field_type(data_types, field_value)
+
     def validate(self, type_name, type_info, value):
-        dt = self.get_type(type_name)
-        if dt:
-            return dt.validate(value, type_info)
-        return False
+        return self.library.validate(type_name, type_info, value)
 
     def is_required_field(self, section_keyword, entry_keyword, field_index):
         field = self.get_field_byindex(section_keyword, entry_keyword, field_index)
@@ -1,9 +1,9 @@
+import re
 import logging
+from array import array
+from bisect import bisect_left
 import eds_pie.cip_eds_types as eds_types
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s.%(levelname)-8s %(message)s"
-)
 logger = logging.getLogger(__name__)
 """
     EDS grammatics:
@@ -119,37 +119,236 @@ class TOKEN_TYPES(eds_types.ENUMS):
     DATASET = 10
 
 
+class LineIndex:
+    """
+    Offsets of all line feeds in the EDS data. The index is built once on the
+    first request and resolves the line and column of an offset by bisection.
+    """
+
+    def __init__(self, eds_data):
+        self.eds_data = eds_data
+        self.lf_offsets = None
+
+    def build(self):
+        lf = SYMBOLS.LF if isinstance(self.eds_data, str) else b"\n"
+        self.lf_offsets = array(
+            "I", (match.start() for match in re.finditer(lf, self.eds_data))
+        )
+
+    def line(self, offset):
+        if self.lf_offsets is None:
+            self.build()
+        return bisect_left(self.lf_offsets, offset) + 1
+
+    def col(self, offset):
+        if self.lf_offsets is None:
+            self.build()
+        if offset >= len(self.eds_data):
+            # End of data keeps the column of the last char
+            offset = len(self.eds_data) - 1
+            if offset < 0 or (self.lf_offsets and self.lf_offsets[-1] == offset):
+                return 1
+        index = bisect_left(self.lf_offsets, offset)
+        if index:
+            return offset - self.lf_offsets[index - 1] + 1
+        return offset + 2
+
+
+class EDSSyntaxError(Exception):
+    """
+    Syntax error in the EDS data. offset is the position of the error in the
+    EDS data. expected and found describe the expected and the found input.
+    """
+
+    def __init__(self, message, offset, expected=None, found=None):
+        super().__init__(message)
+        self.offset = offset
+        self.expected = expected
+        self.found = found
+
+    def __reduce__(self):
+        # Pickled by the worker processes of a parallel parse
+        return type(self), (self.args[0], self.offset, self.expected, self.found)
+
+
+class EVENTS(eds_types.ENUMS):
+    """
+    Events reported to a tracer. A tracer is a callable tracer(event, item)
+    that receives the token, Section, Entry or Field object of the event.
+    Parser.events reports the same events, plus COMMENT, as EdsEvent tuples.
+    """
+
+    TOKEN = 0
+    SECTION = 1
+    ENTRY = 2
+    FIELD = 3
+    COMMENT = 4
+
+
+# Position of a token or of the cursor in error messages, see format_position
+POSITION_PATTERN = re.compile(r"\[Pos: *(-?\d+), Ln: *-?\d+, Col: *-?\d+\]")
+
+
+def format_position(offset, line, col):
+    return f"[Pos: {str(offset).rjust(5)}, Ln: {str(line).rjust(4)}, Col: {str(col).rjust(3)}]"
+
+
+def move_positions(message, offset, line_index):
+    """
+    Returns an error message of a part of the EDS data with its positions
+    moved by offset. line_index is the LineIndex of the whole EDS data.
+    """
+
+    def move(match):
+        position = int(match.group(1)) + offset
+        return format_position(
+            position, line_index.line(position), line_index.col(position)
+        )
+
+    return POSITION_PATTERN.sub(move, message)
+
+
 class Token:
     def __init__(self, type, value, cursor):
         self.type = type
         self.value = value
 
         self.offset = cursor.offset
-        self.col = cursor.col
-        self.line = cursor.line
+        self.line_index = cursor.line_index
+
+    @property
+    def line(self):
+        return self.line_index.line(self.offset)
+
+    @property
+    def col(self):
+        return self.line_index.col(self.offset)
 
     def __str__(self):
         return (
-            f"[Pos: {str(self.offset).rjust(5)}, Ln: {str(self.line).rjust(4)}, "
-            + f'Col: {str(self.col).rjust(3)}] {TOKEN_TYPES.stringify(self.type).ljust(11)} "{self.value}"'
+            format_position(self.offset, self.line, self.col)
+            + f' {TOKEN_TYPES.stringify(self.type).ljust(11)} "{self.value}"'
         )
 
 
 class Cursor:
-    def __init__(self):
+    def __init__(self, line_index):
         self.offset = -1
-        self.col = 1
-        self.line = 1
+        self.line_index = line_index
+
+    @property
+    def line(self):
+        return self.line_index.line(self.offset)
+
+    @property
+    def col(self):
+        return self.line_index.col(self.offset)
+
+    def __str__(self):
+        return format_position(self.offset, self.line, self.col)
+
+
+class TokenTable:
+    """
+    Compact token stream. Tokens are stored in parallel arrays of types and
+    value spans instead of one Token object per token. Values are sliced from
+    the EDS data only when requested.
+    """
+
+    def __init__(self, eds_data, lines=True, line_index=None):
+        self.eds_data = eds_data
+        self.line_index = line_index or LineIndex(eds_data)
+        self.types = array("B")
+        self.starts = array("I")  # Offset of the first char of the token value
+        self.ends = array("I")  # Offset after the last char of the token value
+        self.lines = array("I") if lines else None
+
+    def append(self, type, start, end, line=0):
+        self.types.append(type)
+        self.starts.append(start)
+        self.ends.append(end)
+        if self.lines is not None:
+            self.lines.append(line)
+
+    def append_token(self, token):
+        start = token.offset
+        if token.type == TOKEN_TYPES.STRING or token.type == TOKEN_TYPES.SECTION:
+            start += 1  # Skip the opening quotation mark or bracket
+        self.append(token.type, start, start + len(token.value), token.line)
+
+    def value(self, index):
+        value = self.eds_data[self.starts[index] : self.ends[index]]
+        if isinstance(value, str):
+            return value
+        return str(value, "ascii")
+
+    def offset(self, index):
+        """
+        Token offset the same way the Lexer reports it.
+        """
+        type = self.types[index]
+        if type == TOKEN_TYPES.STRING or type == TOKEN_TYPES.SECTION:
+            return self.starts[index] - 1
+        return self.starts[index]
+
+    def line(self, index):
+        if self.lines is not None:
+            return self.lines[index]
+        return self.line_index.line(self.offset(index))
+
+    def col(self, index):
+        return self.line_index.col(self.offset(index))
+
+    def __len__(self):
+        return len(self.types)
+
+
+class TableToken:
+    """
+    Token view on a TokenTable entry.
+    """
+
+    __slots__ = ("table", "index", "type")
+
+    def __init__(self, table, index, type):
+        self.table = table
+        self.index = index
+        self.type = type
+
+    @property
+    def value(self):
+        return self.table.value(self.index)
+
+    @property
+    def offset(self):
+        return self.table.offset(self.index)
+
+    @property
+    def line(self):
+        return self.table.line(self.index)
+
+    @property
+    def col(self):
+        return self.table.col(self.index)
 
     def __str__(self):
-        return f"[Pos: {str(self.offset).rjust(5)}, Ln: {str(self.line).rjust(4)}, Col: {str(self.col).rjust(3)}]"
+        return Token.__str__(self)
 
 
 class Lexer:
-    def __init__(self, eds_data):
+    accepts_bytes = False  # The EDS data must be decoded to str
+
+    def __init__(self, eds_data, line_index=None, tracer=None, keep_comments=True):
+        """
+        Without keep_comments the comments are skipped like white spaces and
+        no COMMENT tokens are returned.
+        """
         self.eds_data = eds_data
         self.eds_length = len(self.eds_data)
-        self.cursor = Cursor()
+        self.line_index = line_index or LineIndex(eds_data)
+        self.cursor = Cursor(self.line_index)
+        self.tracer = tracer
+        self.keep_comments = keep_comments
 
     def get_char(self):
         assert self.cursor.offset + 1 <= self.eds_length
@@ -158,11 +357,6 @@ class Lexer:
 
         if self.cursor.offset < self.eds_length:
             ch = self.eds_data[self.cursor.offset]
-
-            self.cursor.col += 1
-            if ch == SYMBOLS.LF:
-                self.cursor.line += 1
-                self.cursor.col = 1
         else:  # EOF
             ch = SYMBOLS.EOF
 
@@ -178,6 +372,9 @@ class Lexer:
             return self.eds_data[self.cursor.offset - offset]
         return None
 
+    def error(self, message, expected=None, found=None):
+        return EDSSyntaxError(message, self.cursor.offset, expected, found)
+
     def get_token(self):
 
         token = None
@@ -195,13 +392,18 @@ class Lexer:
                     continue
 
                 if ch == SYMBOLS.DOLLAR:
+                    if not self.keep_comments:
+                        next = self.look_ahead()
+                        while next != SYMBOLS.LF and next != SYMBOLS.CR:
+                            self.cursor.offset += 1
+                            next = self.look_ahead()
+                        continue
                     token = Token(TOKEN_TYPES.COMMENT, "", self.cursor)
                     next = self.look_ahead()
                     if next == SYMBOLS.LF or next == SYMBOLS.EOF:
                         break
 
                     token.offset += 1
-                    token.col += 1
                     continue
 
                 if ch == SYMBOLS.OPENING_BRACKET:
@@ -210,6 +412,8 @@ class Lexer:
 
                 if ch == SYMBOLS.OPENING_BRACE:
                     token = Token(TOKEN_TYPES.DATASET, ch, self.cursor)
+                    if self.look_ahead() == SYMBOLS.SEMICOLON:
+                        break
                     continue
 
                 if (
@@ -243,7 +447,9 @@ class Lexer:
                     token = Token(TOKEN_TYPES.SEPARATOR, ch, self.cursor)
                     break
 
-                raise Exception(f'Unsupported symbol: "{ch}" @{self.cursor}')
+                raise self.error(
+                    f'Unsupported symbol: "{ch}" @{self.cursor}', "EDS token", ch
+                )
 
             if token.type == TOKEN_TYPES.COMMENT:
                 if ch == SYMBOLS.LF or ch == SYMBOLS.CR or ch == SYMBOLS.EOF:
@@ -253,12 +459,16 @@ class Lexer:
 
             if token.type is TOKEN_TYPES.SECTION:
                 if ch == SYMBOLS.LF:
-                    raise Exception(
-                        f".lexer:> Unexpected end of line during processing of section data at offset:{self.cursor.offset}"
+                    raise self.error(
+                        f".lexer:> Unexpected end of line during processing of section data at {self.cursor}",
+                        SYMBOLS.CLOSING_BRACKET,
+                        "end of line",
                     )
                 if ch == SYMBOLS.EOF:
-                    raise Exception(
-                        f".lexer:> Unexpected end of file during processing of section data at offset:{self.cursor.offset}"
+                    raise self.error(
+                        f".lexer:> Unexpected end of file during processing of section data at {self.cursor}",
+                        SYMBOLS.CLOSING_BRACKET,
+                        "end of file",
                     )
                 if ch == SYMBOLS.CLOSING_BRACKET:
                     break
@@ -271,32 +481,40 @@ class Lexer:
                     and (ch not in SECTION_NAME_VALID_SYMBOLES)
                 ):
 
-                    raise Exception(
+                    raise self.error(
                         __name__
-                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}"
+                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}",
+                        "section keyword",
+                        token.value + ch,
                     )
 
                 # unexpected symbols at the beginning or at the end of the section identifier
                 if (token.value == "" or self.look_ahead() == "]") and (
                     not ch.isalpha() and not ch.isdigit()
                 ):
-                    raise Exception(
+                    raise self.error(
                         __name__
-                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}"
+                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}",
+                        "section keyword",
+                        token.value + ch,
                     )
 
                 # Sequential spaces
                 if ch == " " and self.look_ahead().isspace():
-                    raise Exception(
+                    raise self.error(
                         __name__
                         + ".lexer:> Invalid section identifier! Sequential spaces are not allowed."
-                        + f" Unexpected char sequence: {token}"
+                        + f" Unexpected char sequence: {token}",
+                        "section keyword",
+                        token.value + ch,
                     )
 
                 if ch == SYMBOLS.EOF or ch == SYMBOLS.LF:
-                    raise Exception(
+                    raise self.error(
                         __name__
-                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}"
+                        + f".lexer:> Invalid section identifier! Unexpected char sequence: {token}",
+                        "section keyword",
+                        token.value + ch,
                     )
 
                 token.value += ch
@@ -306,11 +524,11 @@ class Lexer:
                 if ch.isspace():
                     break
                 # Switching the token type to other types
-                if ch is SYMBOLS.COLON:
+                if ch == SYMBOLS.COLON:
                     token.type = TOKEN_TYPES.TIME
-                elif ch is SYMBOLS.MINUS:
+                elif ch == SYMBOLS.MINUS:
                     token.type = TOKEN_TYPES.DATE
-                elif ch is SYMBOLS.UNDERLINE:
+                elif ch == SYMBOLS.UNDERLINE:
                     token.type = TOKEN_TYPES.IDENTIFIER
 
                 token.value += ch
@@ -341,20 +559,30 @@ class Lexer:
                     break
 
                 if ch == SYMBOLS.EOF or ch == SYMBOLS.LF:
-                    raise Exception(
+                    raise self.error(
                         __name__
-                        + f".lexer:> Invalid string value! Unexpected char sequence: {token}"
+                        + f".lexer:> Invalid string value! Unexpected char sequence: {token}",
+                        SYMBOLS.QUOTATION,
+                        "end of line" if ch == SYMBOLS.LF else "end of file",
                     )
 
                 token.value += ch
                 continue
 
             if token.type is TOKEN_TYPES.DATASET:
-                if self.look_ahead() == SYMBOLS.SEMICOLON:
-                    break
+                if ch == SYMBOLS.EOF:
+                    raise self.error(
+                        __name__
+                        + f".lexer:> Unexpected end of file during processing of dataset! {token}",
+                        SYMBOLS.CLOSING_BRACE,
+                        "end of file",
+                    )
 
                 token.value += ch
-                if ch == SYMBOLS.CLOSINGBRACE:
+                if (
+                    ch == SYMBOLS.CLOSING_BRACE
+                    or self.look_ahead() == SYMBOLS.SEMICOLON
+                ):
                     break
                 continue
 
@@ -362,8 +590,12 @@ class Lexer:
                 if ch.isspace():
                     break
 
-                if not ch.isdigit() and ch is not SYMBOLS.COLON:
-                    raise Exception(__name__ + f".lexer:> Invalid TIME value! {token}")
+                if not ch.isdigit() and ch != SYMBOLS.COLON:
+                    raise self.error(
+                        __name__ + f".lexer:> Invalid TIME value! {token}",
+                        "TIME",
+                        token.value + ch,
+                    )
                 token.value += ch
 
                 if (
@@ -377,8 +609,12 @@ class Lexer:
                 if ch.isspace():
                     break
 
-                if not ch.isdigit() and ch is not SYMBOLS.MINUS:
-                    raise Exception(__name__ + f".lexer:> Invalid DATE value! {token}")
+                if not ch.isdigit() and ch != SYMBOLS.MINUS:
+                    raise self.error(
+                        __name__ + f".lexer:> Invalid DATE value! {token}",
+                        "DATE",
+                        token.value + ch,
+                    )
 
                 token.value += ch
 
@@ -389,5 +625,428 @@ class Lexer:
                     break
                 continue
 
-        logger.debug("token: {}".format(token or "EOF"))
+        if self.tracer is not None:
+            self.tracer(EVENTS.TOKEN, token)
+        return token
+
+    def skip_section(self):
+        """
+        Moves the lexer past the body of the section which keyword was the last
+        token, without tokenizing it. Returns the offset at which the scanning
+        continues. See skip_section_body.
+        """
+        offset = skip_section_body(self.eds_data, self.cursor.offset + 1)
+        self.cursor.offset = offset - 1
+        return offset
+
+    def resync(self, offset):
+        """
+        Continues scanning at the next section keyword or after the next entry
+        separator, searching from the syntax error at offset. See resync_offset.
+        """
+        offset = resync_offset(self.eds_data, offset, self.cursor.offset + 1)
+        self.cursor.offset = offset - 1
+
+    def tokenize_all(self, lines=True):
+        """
+        Scans the whole EDS data at once and returns the tokens in a TokenTable.
+        """
+        table = TokenTable(self.eds_data, lines, self.line_index)
+        while True:
+            token = self.get_token()
+            table.append_token(token)
+            if token.type == TOKEN_TYPES.EOF:
+                return table
+
+
+# Master pattern of the table driven scanner. Each alternative reproduces the
+# state machine of Lexer.get_token for one token type. Leading white spaces are
+# skipped by the same match. Input that none of the alternatives accept is
+# matched by the empty INVALID alternative and handed over to the character based
+# Lexer which reports the syntax error. White spaces are matched as
+# [\s\x1c-\x1f] to accept the same chars as str.isspace() in bytes data too.
+SCANNER_PATTERN_SOURCE = r"""
+    [\s\x1c-\x1f]*(?:
+        (?P<COMMENT>\$[^\r\n]*)
+      | (?P<SECTION>
+            \[
+            [A-Za-z0-9]
+            (?:(?:[A-Za-z0-9\-.\\_/\t\r\x0b\x0c]|\ (?![\s\x1c-\x1f]))*[A-Za-z0-9])?
+            \]
+        )
+      | (?P<TIME>[-+.0-9][^\s\x1c-\x1f=,;:_-]*:[0-9:]*(?=[\s\x1c-\x1f=,;]|\Z))
+      | (?P<DATE>[-+.0-9][^\s\x1c-\x1f=,;:_-]*-[0-9-]*(?=[\s\x1c-\x1f=,;]|\Z))
+      | (?P<IDENTIFIER>
+            [-+.0-9][^\s\x1c-\x1f=,;:_-]*_[^\s\x1c-\x1f=,;]*
+          | [A-Za-z][^\s\x1c-\x1f=,;]*
+        )
+      | (?P<NUMBER>[-+.0-9][^\s\x1c-\x1f=,;:_-]*(?=[\s\x1c-\x1f=,;]|\Z))
+      | (?P<STRING>"[^"\n]*(?:(?<=\\)"[^"\n]*)*(?<!\\)")
+      | (?P<DATASET>\{[^};]*(?:\}|(?=;)))
+      | (?P<OPERATOR>=)
+      | (?P<SEPARATOR>[,;])
+      | (?P<EOF>\Z)
+      | (?P<INVALID>)
+    )
+    """
+SCANNER_PATTERN = re.compile(SCANNER_PATTERN_SOURCE, re.VERBOSE)
+# Same pattern for scanning ASCII encoded EDS data in bytes, mmap or memoryview
+BYTES_SCANNER_PATTERN = re.compile(
+    SCANNER_PATTERN_SOURCE.encode("ascii"), re.VERBOSE
+)
+# Scanner pattern which skips comments together with the leading white spaces.
+# The COMMENT alternative is never reached.
+COMMENT_FREE_SCANNER_PATTERN_SOURCE = SCANNER_PATTERN_SOURCE.replace(
+    r"[\s\x1c-\x1f]*(?:", r"(?:[\s\x1c-\x1f]+|\$[^\r\n]*)*(?:", 1
+)
+COMMENT_FREE_SCANNER_PATTERN = re.compile(
+    COMMENT_FREE_SCANNER_PATTERN_SOURCE, re.VERBOSE
+)
+BYTES_COMMENT_FREE_SCANNER_PATTERN = re.compile(
+    COMMENT_FREE_SCANNER_PATTERN_SOURCE.encode("ascii"), re.VERBOSE
+)
+
+
+# Section body up to the next section keyword or the end of the EDS data.
+# Brackets within quoted strings and comments do not start a section.
+SKIP_PATTERN_SOURCE = r"""
+    (?:
+        [^\["$]+
+      | "[^"\n]*(?:(?<=\\)"[^"\n]*)*"?
+      | \$[^\r\n]*
+    )*
+    """
+SKIP_PATTERN = re.compile(SKIP_PATTERN_SOURCE, re.VERBOSE)
+BYTES_SKIP_PATTERN = re.compile(SKIP_PATTERN_SOURCE.encode("ascii"), re.VERBOSE)
+
+
+def skip_section_body(eds_data, offset):
+    """
+    Returns the offset at which the scanning continues after skipping the
+    section body that starts at offset. That is the next section keyword or the
+    end of the EDS data. Comment lines right before the next section keyword are
+    not skipped since they are the heading comment of that section.
+    """
+    if isinstance(eds_data, str):
+        end = SKIP_PATTERN.match(eds_data, offset).end()
+    else:
+        end = BYTES_SKIP_PATTERN.match(eds_data, offset).end()
+
+    window = 1024
+    while True:
+        start = max(offset, end - window)
+        text = eds_data[start:end]
+        if not isinstance(text, str):
+            text = str(text, "ascii")
+        lines = text.split(SYMBOLS.LF)
+
+        # Walk back over blank and comment lines
+        resume = line_start = end
+        for index in range(len(lines) - 1, 0, -1):
+            line = lines[index].strip()
+            line_start -= len(lines[index])
+            if line and line[0] != SYMBOLS.DOLLAR:
+                return resume
+            resume = line_start
+            line_start -= 1
+        if start == offset:
+            # The first line is the rest of the section keyword line
+            return resume
+        # The first line might be cut off by the window
+        window *= 4
+
+
+# Input up to the next entry separator or section keyword. Separators and
+# brackets within quoted strings and comments are ignored.
+RESYNC_PATTERN_SOURCE = r"""
+    (?:
+        [^\[;"$]+
+      | "[^"\n]*(?:(?<=\\)"[^"\n]*)*"?
+      | \$[^\r\n]*
+    )*
+    """
+RESYNC_PATTERN = re.compile(RESYNC_PATTERN_SOURCE, re.VERBOSE)
+BYTES_RESYNC_PATTERN = re.compile(RESYNC_PATTERN_SOURCE.encode("ascii"), re.VERBOSE)
+
+
+def resync_offset(eds_data, offset, position):
+    """
+    Returns the offset at which the scanning continues after a syntax error at
+    offset. That is the next section keyword or the offset after the next entry
+    separator. A section keyword or a separator at offset is taken, otherwise
+    the search starts after offset, but not before position which is the
+    offset of the next char to be scanned.
+    """
+    if eds_data[offset : offset + 1] not in ("[", ";", b"[", b";"):
+        offset = max(offset + 1, position)
+    if isinstance(eds_data, str):
+        offset = RESYNC_PATTERN.match(eds_data, offset).end()
+    else:
+        offset = BYTES_RESYNC_PATTERN.match(eds_data, offset).end()
+    if eds_data[offset : offset + 1] in (";", b";"):
+        offset += 1
+    return offset
+
+
+# Rest of the line after an entry separator: blanks and a comment
+LINE_END_PATTERN_SOURCE = r"[ \t]*(?:\$[^\r\n]*)?\r?\n"
+LINE_END_PATTERN = re.compile(LINE_END_PATTERN_SOURCE)
+BYTES_LINE_END_PATTERN = re.compile(LINE_END_PATTERN_SOURCE.encode("ascii"))
+
+
+def split_offsets(eds_data, size):
+    """
+    Returns the offsets at which the EDS data is split into parts of about size
+    chars to be parsed separately, as a list of (offset, section_offset). A
+    part starts at a section keyword, then section_offset equals offset. A
+    section larger than size is split at the lines following an entry
+    separator, then section_offset is the offset of its keyword. The first part
+    starts at offset 0.
+    """
+    if isinstance(eds_data, str):
+        skip_pattern = SKIP_PATTERN
+        resync_pattern = RESYNC_PATTERN
+        line_end_pattern = LINE_END_PATTERN
+    else:
+        skip_pattern = BYTES_SKIP_PATTERN
+        resync_pattern = BYTES_RESYNC_PATTERN
+        line_end_pattern = BYTES_LINE_END_PATTERN
+
+    offsets = [(0, None)]
+    part_start = 0
+    length = len(eds_data)
+    section_start = skip_pattern.match(eds_data, 0).end()
+    while section_start < length:
+        section_end = skip_pattern.match(eds_data, section_start + 1).end()
+        if section_end - part_start > size and section_start > part_start:
+            offsets.append((section_start, section_start))
+            part_start = section_start
+
+        # Split a large section after the entries
+        position = section_start + 1
+        while section_end - part_start > size:
+            position = resync_pattern.match(eds_data, position).end()
+            if position >= section_end:
+                break
+            position += 1  # Entry separator
+            if position - part_start < size:
+                continue
+            match = line_end_pattern.match(eds_data, position)
+            if match is None:
+                continue
+            # The rest of the section has to contain another entry
+            if resync_pattern.match(eds_data, match.end()).end() < section_end:
+                offsets.append((match.end(), section_start))
+                part_start = match.end()
+        section_start = section_end
+    return offsets
+
+
+class RegexLexer(Lexer):
+    """
+    Scanner that matches complete tokens with one compiled pattern instead of
+    reading the EDS data char by char. Produces the same tokens as the Lexer.
+    The EDS data can also be ASCII encoded bytes, mmap or memoryview. In that
+    case only the token values are decoded.
+    """
+
+    accepts_bytes = True
+
+    # Token types by scanner pattern group
+    GROUP_TYPES = {
+        "COMMENT": TOKEN_TYPES.COMMENT,
+        "SECTION": TOKEN_TYPES.SECTION,
+        "TIME": TOKEN_TYPES.TIME,
+        "DATE": TOKEN_TYPES.DATE,
+        "IDENTIFIER": TOKEN_TYPES.IDENTIFIER,
+        "NUMBER": TOKEN_TYPES.NUMBER,
+        "STRING": TOKEN_TYPES.STRING,
+        "DATASET": TOKEN_TYPES.DATASET,
+        "OPERATOR": TOKEN_TYPES.OPERATOR,
+        "SEPARATOR": TOKEN_TYPES.SEPARATOR,
+        "EOF": TOKEN_TYPES.EOF,
+    }
+
+    def __init__(self, eds_data, line_index=None, tracer=None, keep_comments=True):
+        super().__init__(eds_data, line_index, tracer, keep_comments)
+        self.offset = 0  # Offset of the next char to be scanned
+        if isinstance(eds_data, str):
+            self.pattern = (
+                SCANNER_PATTERN if keep_comments else COMMENT_FREE_SCANNER_PATTERN
+            )
+            self.char_lexer = self
+        else:
+            self.pattern = (
+                BYTES_SCANNER_PATTERN
+                if keep_comments
+                else BYTES_COMMENT_FREE_SCANNER_PATTERN
+            )
+            self.char_lexer = None  # Created on demand from the decoded EDS data
+
+    def skip_section(self):
+        self.offset = skip_section_body(self.eds_data, self.offset)
+        return self.offset
+
+    def resync(self, offset):
+        self.offset = resync_offset(self.eds_data, offset, self.offset)
+
+    def text(self, start, end):
+        text = self.eds_data[start:end]
+        if isinstance(text, str):
+            return text
+        return str(text, "ascii")
+
+    def get_token(self):
+        match = self.pattern.match(self.eds_data, self.offset)
+        group = match.lastgroup
+        start = match.start(group)
+        end = match.end()
+
+        if group == "INVALID":
+            # Let the Lexer process the unknown char sequence to get the same
+            # token or the same error.
+            if self.char_lexer is None:
+                self.char_lexer = Lexer(
+                    str(self.eds_data, "ascii"),
+                    self.line_index,
+                    self.tracer,
+                    self.keep_comments,
+                )
+            self.char_lexer.cursor.offset = start - 1
+            token = Lexer.get_token(self.char_lexer)
+            self.offset = self.char_lexer.cursor.offset + 1
+            return token
+
+        self.offset = end
+        self.cursor.offset = start
+
+        if group == "COMMENT":
+            value = self.text(start + 1, end)
+            if value or self.text(end, end + 1) == SYMBOLS.CR:
+                self.cursor.offset += 1
+        elif group == "SECTION" or group == "STRING":
+            value = self.text(start + 1, end - 1)
+        elif group == "EOF":
+            value = ""
+        else:
+            value = self.text(start, end)
+
+        token = Token(self.GROUP_TYPES[group], value, self.cursor)
+        if self.tracer is not None:
+            self.tracer(EVENTS.TOKEN, token)
+        return token
+
+    def tokenize_all(self, lines=True):
+        """
+        Scans the whole EDS data at once and returns the tokens in a TokenTable.
+        No Token objects are created except for char sequences the scanner
+        pattern does not accept.
+        """
+        table = TokenTable(self.eds_data, lines, self.line_index)
+        append = table.append
+        match = self.pattern.match
+        group_types = self.GROUP_TYPES
+        tracer = self.tracer
+        eds_data = self.eds_data
+        offset = self.offset
+        cr = SYMBOLS.CR if isinstance(eds_data, str) else b"\r"
+        line = self.line_index.line
+
+        while True:
+            scanned = match(eds_data, offset)
+            group = scanned.lastgroup
+
+            if group == "INVALID":
+                self.offset = offset
+                table.append_token(self.get_token())
+                offset = self.offset
+                continue
+
+            start = scanned.start(group)
+            offset = scanned.end()
+            start_line = line(start) if lines else 0
+
+            if group == "COMMENT":
+                if offset == start + 1 and eds_data[offset : offset + 1] != cr:
+                    # Empty comment is reported at the position of the dollar sign
+                    append(TOKEN_TYPES.COMMENT, start, start, start_line)
+                else:
+                    append(TOKEN_TYPES.COMMENT, start + 1, offset, start_line)
+            elif group == "SECTION" or group == "STRING":
+                append(group_types[group], start + 1, offset - 1, start_line)
+            else:
+                append(group_types[group], start, offset, start_line)
+
+            if tracer is not None:
+                index = len(table) - 1
+                tracer(EVENTS.TOKEN, TableToken(table, index, table.types[index]))
+            if group == "EOF":
+                break
+
+        self.offset = offset
+        return table
+
+
+class TableLexer:
+    """
+    Reads the tokens of a TokenTable through the Lexer interface. The returned
+    token is a view on the table and remains valid until the next get_token call.
+    """
+
+    def __init__(self, table, tracer=None):
+        self.table = table
+        self.line_index = table.line_index
+        self.token = TableToken(table, -1, None)
+        self.tracer = tracer
+
+    def resync(self, offset):
+        """
+        Moves to the next section keyword or after the next entry separator,
+        starting at the current token. Lexer errors are raised while the table
+        is built, so the current token is the one of the syntax error.
+        """
+        table = self.table
+        types = table.types
+        index = self.token.index
+        while True:
+            if types[index] == TOKEN_TYPES.SECTION or types[index] == TOKEN_TYPES.EOF:
+                index -= 1
+                break
+            if (
+                types[index] == TOKEN_TYPES.SEPARATOR
+                and table.value(index) == SYMBOLS.SEMICOLON
+            ):
+                break
+            index += 1
+        self.token.index = index
+        self.token.type = types[index]
+
+    def skip_section(self):
+        """
+        Moves to the last token of the current section body. The comments
+        preceding the next section are kept like skip_section_body does.
+        """
+        table = self.table
+        types = table.types
+        first = self.token.index + 1
+        index = first
+        while types[index] != TOKEN_TYPES.SECTION and types[index] != TOKEN_TYPES.EOF:
+            index += 1
+        while index > first and types[index - 1] == TOKEN_TYPES.COMMENT:
+            index -= 1
+        # A comment on the line of the last token is still part of the section
+        if types[index] == TOKEN_TYPES.COMMENT and table.line(index) == table.line(
+            index - 1
+        ):
+            index += 1
+        self.token.index = index - 1
+        self.token.type = types[index - 1]
+
+    def get_token(self):
+        token = self.token
+        if token.type != TOKEN_TYPES.EOF:
+            token.index += 1
+            token.type = self.table.types[token.index]
+        if self.tracer is not None:
+            self.tracer(EVENTS.TOKEN, token)
         return token
@@ -1,16 +1,45 @@
+import os
+import mmap
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import logging
+from collections import namedtuple
 
 import eds_pie.cip_eds_types as eds_types
-from .eds_lexer import Lexer, TOKEN_TYPES, SYMBOLS
-from .eds import EDS
+from .eds_lexer import (
+    Lexer,
+    RegexLexer,
+    TableLexer,
+    TokenTable,
+    LineIndex,
+    EDSSyntaxError,
+    split_offsets,
+    move_positions,
+    TOKEN_TYPES,
+    SYMBOLS,
+    EVENTS,
+)
+from .eds import EDS, FieldColumns, SectionSpan
 
 from ._version import __version__
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s.%(levelname)-8s %(message)s"
-)
 logger = logging.getLogger(__name__)
 
+# Event of the streaming parser. section and entry are the keywords the event
+# belongs to, field is the field index and value is the field value or the
+# comment text.
+EdsEvent = namedtuple("EdsEvent", "event section entry field value")
+
+# Syntax error found by an error-recovering parse. expected and found describe
+# the expected and the found input.
+Diagnostic = namedtuple("Diagnostic", "offset line col expected found message")
+
+# EDS data smaller than this is parsed serially even if processes are requested
+PARALLEL_MIN_SIZE = 1024 * 1024
+# Minimum size of the parts parsed by the processes
+PARALLEL_PART_SIZE = 256 * 1024
+
 
 class State(eds_types.ENUMS):
     EXPECT_SECTION = 0
@@ -19,184 +48,826 @@ class State(eds_types.ENUMS):
     EXPECT_FIELD = 3
 
 
+def parse_part(eds_data, prefix, lexer_class, sections, recover, keep_comments):
+    """
+    Parses a part of the EDS data in a worker process of Parser.parse_parallel.
+    prefix is the section keyword line of a part which starts within a section.
+    The sections are returned as nested tuples since these are transferred
+    much faster than the Section, Entry and Field objects:
+    (keyword, line_number, offset, hcomment, fcomment, entries) with entries
+    (keyword, line_number, hcomment, fcomment, fields) and fields
+    (value, line_number, hcomment, fcomment).
+    """
+    parser = Parser(
+        prefix + eds_data,
+        lexer_class=lexer_class,
+        sections=sections,
+        recover=recover,
+        keep_comments=keep_comments,
+    )
+    eds = parser.parse()
+    sections = [
+        (
+            section.keyword,
+            section.line_number,
+            section.offset,
+            section.hcomment,
+            section.fcomment,
+            [
+                (
+                    entry.keyword,
+                    entry.line_number,
+                    entry.hcomment,
+                    entry.fcomment,
+                    [
+                        (field.raw_value, field.line_number, field.hcomment, field.fcomment)
+                        for field in entry.fields
+                    ],
+                )
+                for entry in section.entries.values()
+            ],
+        )
+        for section in eds.sections.values()
+    ]
+    entry_open = parser.state not in (
+        State.EXPECT_SECTION,
+        State.EXPECT_SECTION_OR_ENTRY,
+    )
+    return (
+        sections,
+        eds.hcomment,
+        eds.fcomment,
+        eds.skipped_sections,
+        eds.diagnostics,
+        entry_open,
+    )
+
+
 class Parser:
-    def __init__(self, eds_data, showprogress=False):
-        self.lexer = Lexer(eds_data)
+    def __init__(
+        self,
+        eds_data,
+        showprogress=False,
+        lexer_class=Lexer,
+        tracer=None,
+        sections=None,
+        lazy=False,
+        recover=False,
+        columnar=False,
+        keep_comments=True,
+    ):
+        """
+        eds_data is either the EDS content or a TokenTable of an already
+        tokenized EDS content.
+        tracer is an optional callable tracer(event, item) which is called for
+        each token, section, entry and field. See EVENTS.
+        sections is an optional collection of section keywords to be parsed.
+        The bodies of all other sections are skipped without being tokenized.
+        In lazy mode only the keywords and spans of the sections are indexed.
+        Each section is parsed the first time it is accessed.
+        In recover mode the parser continues after syntax errors at the next
+        section or entry. The errors are reported as Diagnostic in
+        EDS.diagnostics.
+        With columnar set the fields are stored in the FieldColumns of the EDS.
+        columnar can also be the FieldColumns of the EDS which a part of the EDS
+        data is parsed for.
+        Without keep_comments the lexer skips the comments and the EDS holds no
+        comments at all.
+        """
+        if isinstance(eds_data, TokenTable):
+            if lazy:
+                raise Exception("Lazy parsing requires the EDS data, not a TokenTable")
+            self.lexer = TableLexer(eds_data, tracer=tracer)
+            self.eds_data = eds_data.eds_data
+        else:
+            self.lexer = lexer_class(
+                eds_data, tracer=tracer, keep_comments=keep_comments
+            )
+            self.eds_data = eds_data
+        self.line_index = self.lexer.line_index
+        self.lexer_class = lexer_class
+        self.tracer = tracer
+        self.sections = sections
+        self.lazy = lazy
+        self.recover = recover
+        self.columnar = columnar
+        self.keep_comments = keep_comments
         self.state = State.EXPECT_SECTION
-        self.eds = EDS()
+        self.eds = None
         self.section_in_process = None
         self.entry_in_process = None
         self.field_in_process = None
-        self.cached_comment = ""
+        # Comment lines are collected in lists and joined once per item.
+        # cached_comment holds the lines before the next item, header_comment
+        # the lines before the first section and fcomment_lines the lines
+        # after fcomment_item.
+        self.cached_comment = []
+        self.header_comment = []
+        self.fcomment_item = None
+        self.fcomment_lines = []
+
+    def new_eds(self):
+        if isinstance(self.columnar, FieldColumns):
+            return EDS(self.columnar)
+        if self.columnar:
+            return EDS(FieldColumns())
+        return EDS()
 
     def parse(self):
+        self.eds = self.new_eds()
+        self.eds.parser = self
+        if self.lazy:
+            self.eds.sections.loader = self.load_section
 
+        token = None
         while True:
-            token = self.lexer.get_token()
+            try:
+                token = self.lexer.get_token()
 
-            if token.type is TOKEN_TYPES.EOF:
-                self.on_EOF()
-                break
+                if token.type is TOKEN_TYPES.EOF:
+                    self.on_EOF()
+                    break
 
-            if self.match(token, TOKEN_TYPES.COMMENT):
-                self.add_comment(token.value, token.line)
-                continue
+                if token.type == TOKEN_TYPES.COMMENT:
+                    # Comments of a TokenTable are dropped without keep_comments
+                    if self.keep_comments:
+                        self.add_comment(token.value, token.line)
+                    continue
 
-            if self.state is State.EXPECT_SECTION:
-                self.expect(token, TOKEN_TYPES.SECTION)
-                self.entry_in_process = None
-                self.field_in_process = None
-                self.section_in_process = self.eds.add_section(token.value, token.line)
+                if token.type == TOKEN_TYPES.SECTION and (
+                    self.state is State.EXPECT_SECTION
+                    or self.state is State.EXPECT_SECTION_OR_ENTRY
+                ):
+                    if self.sections is not None and token.value not in self.sections:
+                        self.skip_section(token.value)
+                        continue
+                    if self.lazy:
+                        self.index_section(token)
+                        continue
 
-                if self.section_in_process is None:
-                    raise Exception(f"Unable to create Section: {token.value}")
+                if self.state is State.EXPECT_SECTION:
+                    self.expect(token, TOKEN_TYPES.SECTION)
+                    self.entry_in_process = None
+                    self.field_in_process = None
+                    self.section_in_process = self.eds.add_section(token.value, token.line)
 
-                if self.cached_comment:
-                    self.section_in_process.hcomment = self.cached_comment
-                    self.cached_comment = ""
+                    if self.section_in_process is None:
+                        raise Exception(f"Unable to create Section: {token.value}")
+                    self.section_in_process.offset = token.offset
+                    if self.tracer is not None:
+                        self.tracer(EVENTS.SECTION, self.section_in_process)
 
-                self.state = State.EXPECT_ENTRY
-                continue
+                    if self.cached_comment:
+                        self.section_in_process.hcomment = self.take_comment()
 
-            if self.state is State.EXPECT_ENTRY:
+                    self.state = State.EXPECT_ENTRY
+                    continue
 
-                self.expect(token, TOKEN_TYPES.IDENTIFIER)
-                self.entry_in_process = None
-                self.entry_in_process = self.eds.add_entry(
-                    self.section_in_process.keyword, token.value, token.line
-                )
+                if self.state is State.EXPECT_ENTRY:
 
-                if self.entry_in_process is None:
-                    raise Exception(f"Unable to create Entry: {token.value}")
+                    self.expect(token, TOKEN_TYPES.IDENTIFIER)
+                    self.entry_in_process = None
+                    self.entry_in_process = self.section_in_process.add_entry(
+                        token.value, token.line
+                    )
 
-                if self.cached_comment:
-                    self.entry_in_process.hcomment = self.cached_comment
-                    self.cached_comment = ""
+                    if self.entry_in_process is None:
+                        raise Exception(f"Unable to create Entry: {token.value}")
+                    if self.tracer is not None:
+                        self.tracer(EVENTS.ENTRY, self.entry_in_process)
 
-                # Expecting at least one field.
-                self.expect(
-                    self.lexer.get_token(), TOKEN_TYPES.OPERATOR, SYMBOLS.ASSIGNMENT
-                )
-                self.state = State.EXPECT_FIELD
-                continue
+                    if self.cached_comment:
+                        self.entry_in_process.hcomment = self.take_comment()
 
-            if self.state is State.EXPECT_FIELD:
+                    # Expecting at least one field.
+                    self.expect(
+                        self.lexer.get_token(), TOKEN_TYPES.OPERATOR, SYMBOLS.ASSIGNMENT
+                    )
+                    self.state = State.EXPECT_FIELD
+                    continue
 
-                if self.match(
-                    token, TOKEN_TYPES.SEPARATOR, SYMBOLS.SEMICOLON
-                ) or self.match(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.COMMA):
-                    # Empty Field
-                    self.field_in_process = self.eds.add_field(
-                        self.section_in_process.keyword,
-                        self.entry_in_process.keyword,
-                        "",
-                        line_number=token.line,
+                if self.state is State.EXPECT_FIELD:
+
+                    if self.match(
+                        token, TOKEN_TYPES.SEPARATOR, SYMBOLS.SEMICOLON
+                    ) or self.match(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.COMMA):
+                        # Empty Field
+                        self.field_in_process = self.entry_in_process.append_field(
+                            "", token.line
+                        )
+                    else:
+                        # Store token data to concatenate field values if required
+                        field_value = token.value
+
+                        # Strings can be teared down into multiple lines
+                        if token.type == TOKEN_TYPES.STRING:
+                            while True:
+                                token = self.lexer.get_token()
+                                if not self.match(token, TOKEN_TYPES.STRING):
+                                    break
+                                field_value += token.value
+                        else:
+                            token = self.lexer.get_token()
+
+                        self.field_in_process = self.entry_in_process.append_field(
+                            field_value, token.line
+                        )
+
+                    if self.field_in_process is None:
+                        raise Exception(f"Unable to create Field: {token.value}")
+                    if self.tracer is not None:
+                        self.tracer(EVENTS.FIELD, self.field_in_process)
+
+                    if self.cached_comment:
+                        self.field_in_process.hcomment = self.take_comment()
+
+                    if self.match(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.COMMA):
+                        continue
+
+                    self.expect(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.SEMICOLON)
+                    # End of Entry. The next token might be an entry or a new section
+                    self.state = State.EXPECT_SECTION_OR_ENTRY
+                    continue
+
+                if self.state is State.EXPECT_SECTION_OR_ENTRY:
+
+                    if self.match(token, TOKEN_TYPES.SECTION):
+                        self.entry_in_process = None
+                        self.field_in_process = None
+                        self.section_in_process = self.eds.add_section(
+                            token.value, token.line
+                        )
+                        if self.section_in_process is None:
+                            raise Exception(
+                                f"Unable to create section: {token.value}"
+                            )
+                        self.section_in_process.offset = token.offset
+                        if self.tracer is not None:
+                            self.tracer(EVENTS.SECTION, self.section_in_process)
+                        if self.cached_comment:
+                            self.section_in_process.hcomment = self.take_comment()
+                        self.state = State.EXPECT_ENTRY
+                        continue
+
+                    self.expect(token, TOKEN_TYPES.IDENTIFIER)
+                    self.entry_in_process = None
+                    self.entry_in_process = self.section_in_process.add_entry(
+                        token.value, token.line
+                    )
+                    if self.entry_in_process is None:
+                        raise Exception(f"Unable to create entry: {token.value}")
+                    if self.tracer is not None:
+                        self.tracer(EVENTS.ENTRY, self.entry_in_process)
+                    if self.cached_comment:
+                        self.entry_in_process.hcomment = self.take_comment()
+                    # Expecting at least one field.
+                    self.expect(
+                        self.lexer.get_token(), TOKEN_TYPES.OPERATOR, SYMBOLS.ASSIGNMENT
+                    )
+                    self.state = State.EXPECT_FIELD
+                    continue
+
+                raise Exception(__name__ + f":> Invalid Parser state! {self.state}")
+            except Exception as error:
+                if not self.recover:
+                    raise
+                self.recover_from(error, token)
+
+        return self.eds
+
+    def recover_from(self, error, token):
+        """
+        Records the error as a Diagnostic and continues at the next section or
+        after the next entry separator.
+        """
+        if isinstance(error, EDSSyntaxError):
+            diagnostic = (error.offset, error.expected, error.found)
+        elif token is not None and (
+            token.type == TOKEN_TYPES.SECTION or token.type == TOKEN_TYPES.IDENTIFIER
+        ):
+            # Section or entry could not be created, e.g. a duplicate one
+            diagnostic = (token.offset, None, token.value)
+        else:
+            raise error
+        offset = diagnostic[0]
+        line_index = self.line_index
+        self.eds.diagnostics.append(
+            Diagnostic(
+                offset,
+                line_index.line(offset),
+                line_index.col(offset),
+                diagnostic[1],
+                diagnostic[2],
+                str(error),
+            )
+        )
+
+        self.entry_in_process = None
+        self.field_in_process = None
+        if not isinstance(error, EDSSyntaxError) and token.type == TOKEN_TYPES.SECTION:
+            # The section could not be created. Skip it as a whole.
+            self.section_in_process = None
+            self.lexer.skip_section()
+            self.state = State.EXPECT_SECTION
+            return
+
+        self.lexer.resync(offset)
+        if self.section_in_process is None:
+            self.state = State.EXPECT_SECTION
+        else:
+            self.state = State.EXPECT_SECTION_OR_ENTRY
+
+    def events(self, comments=False):
+        """
+        Streams the EDS content as EdsEvent tuples without building the EDS
+        object tree. No semantic validation is performed. Comments are only
+        reported if requested and are not attached to any section, entry or
+        field.
+        """
+        get_token = self.lexer.get_token
+        state = State.EXPECT_SECTION
+        section_keyword = None
+        entry_keyword = None
+        field_index = None
+
+        while True:
+            token = get_token()
+            token_type = token.type
+
+            if token_type == TOKEN_TYPES.EOF:
+                return
+
+            if token_type == TOKEN_TYPES.COMMENT:
+                if comments:
+                    yield EdsEvent(
+                        EVENTS.COMMENT,
+                        section_keyword,
+                        entry_keyword,
+                        field_index,
+                        token.value,
                     )
+                continue
+
+            if state == State.EXPECT_FIELD:
+                if token_type == TOKEN_TYPES.SEPARATOR:
+                    # Empty Field
+                    field_value = ""
                 else:
-                    # Store token data to concatenate field values if required
                     field_value = token.value
-
                     # Strings can be teared down into multiple lines
-                    if token.type == TOKEN_TYPES.STRING:
+                    if token_type == TOKEN_TYPES.STRING:
                         while True:
-                            token = self.lexer.get_token()
-                            if not self.match(token, TOKEN_TYPES.STRING):
+                            token = get_token()
+                            if token.type != TOKEN_TYPES.STRING:
                                 break
                             field_value += token.value
                     else:
-                        token = self.lexer.get_token()
+                        token = get_token()
 
-                    self.field_in_process = self.eds.add_field(
-                        self.section_in_process.keyword,
-                        self.entry_in_process.keyword,
-                        field_value,
-                        line_number=token.line,
-                    )
-
-                if self.field_in_process is None:
-                    raise Exception(f"Unable to create Field: {token.value}")
-
-                if self.cached_comment:
-                    self.field_in_process.hcomment = self.cached_comment
-                    self.cached_comment = ""
+                field_index += 1
+                yield EdsEvent(
+                    EVENTS.FIELD,
+                    section_keyword,
+                    entry_keyword,
+                    field_index,
+                    field_value,
+                )
 
                 if self.match(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.COMMA):
                     continue
-
                 self.expect(token, TOKEN_TYPES.SEPARATOR, SYMBOLS.SEMICOLON)
-                # End of Entry. The next token might be an entry or a new section
-                self.state = State.EXPECT_SECTION_OR_ENTRY
+                state = State.EXPECT_SECTION_OR_ENTRY
                 continue
 
-            if self.state is State.EXPECT_SECTION_OR_ENTRY:
+            if token_type == TOKEN_TYPES.SECTION and state != State.EXPECT_ENTRY:
+                section_keyword = token.value
+                entry_keyword = None
+                field_index = None
+                yield EdsEvent(EVENTS.SECTION, section_keyword, None, None, None)
+                state = State.EXPECT_ENTRY
+                continue
 
-                if self.match(token, TOKEN_TYPES.SECTION):
-                    self.entry_in_process = None
-                    self.field_in_process = None
-                    self.section_in_process = self.eds.add_section(
-                        token.value, token.line
-                    )
-                    if self.section_in_process is None:
-                        raise Exception(
-                            f"Unable to create section: {token.value}"
-                        )
-                    if self.cached_comment:
-                        self.section_in_process.hcomment = self.cached_comment
-                        self.cached_comment = ""
-                    self.state = State.EXPECT_ENTRY
-                    continue
+            if state == State.EXPECT_SECTION:
+                self.expect(token, TOKEN_TYPES.SECTION)
+            self.expect(token, TOKEN_TYPES.IDENTIFIER)
+            entry_keyword = token.value
+            field_index = -1
+            yield EdsEvent(EVENTS.ENTRY, section_keyword, entry_keyword, None, None)
+            # Expecting at least one field.
+            self.expect(get_token(), TOKEN_TYPES.OPERATOR, SYMBOLS.ASSIGNMENT)
+            state = State.EXPECT_FIELD
+
+    def skip_section(self, section_keyword):
+        self.eds.skipped_sections.add(section_keyword)
+        self.section_in_process = None
+        self.entry_in_process = None
+        self.field_in_process = None
+        # Comments of the skipped section are dropped
+        self.cached_comment.clear()
+        self.lexer.skip_section()
+        self.state = State.EXPECT_SECTION
+
+    def index_section(self, token):
+        """
+        Adds the section as a SectionSpan and skips its body.
+        """
+        start = token.offset
+        line_number = token.line
+        end = self.lexer.skip_section()
+        self.eds.sections.add_span(
+            SectionSpan(
+                self.eds_data,
+                token.value,
+                start,
+                end,
+                line_number,
+                self.take_comment(),
+            )
+        )
+        self.section_in_process = None
+        self.entry_in_process = None
+        self.field_in_process = None
+        self.state = State.EXPECT_SECTION
+
+    def parse_text(self, eds_data):
+        """
+        Parses a part of the EDS data with the settings of this parser.
+        """
+        return Parser(
+            eds_data,
+            lexer_class=self.lexer_class,
+            tracer=self.tracer,
+            sections=self.sections,
+            recover=self.recover,
+            columnar=self.columnar if self.eds is None else self.eds.field_columns,
+            keep_comments=self.keep_comments,
+        ).parse()
+
+    def parse_parallel(self, processes=None):
+        """
+        Splits the EDS data at section keywords and entries, parses the parts in
+        a pool of processes and merges them into one EDS. processes is the
+        number of worker processes, all CPUs if None. See split_offsets.
+        """
+        eds_data = self.eds_data
+        length = len(eds_data)
+        workers = processes or os.cpu_count() or 1
+        offsets = split_offsets(
+            eds_data, max(PARALLEL_PART_SIZE, length // (workers * 4) + 1)
+        )
+        if isinstance(eds_data, str):
+            new_line, bracket = SYMBOLS.LF, SYMBOLS.CLOSING_BRACKET
+        else:
+            new_line, bracket = b"\n", b"]"
+        parts = []
+        prefixes = []
+        for index, (offset, section_offset) in enumerate(offsets):
+            end = offsets[index + 1][0] if index + 1 < len(offsets) else length
+            parts.append(eds_data[offset:end])
+            if section_offset is None or section_offset == offset:
+                prefixes.append(eds_data[0:0])
+            else:
+                keyword_end = eds_data.find(bracket, section_offset)
+                prefixes.append(eds_data[section_offset : keyword_end + 1] + new_line)
 
-                self.expect(token, TOKEN_TYPES.IDENTIFIER)
-                self.entry_in_process = None
-                self.entry_in_process = self.eds.add_entry(
-                    self.section_in_process.keyword, token.value, token.line
+        self.eds = self.new_eds()
+        self.eds.parser = self
+        try:
+            with ProcessPoolExecutor(processes) as executor:
+                results = executor.map(
+                    parse_part,
+                    parts,
+                    prefixes,
+                    repeat(self.lexer_class),
+                    repeat(self.sections),
+                    repeat(self.recover),
+                    repeat(self.keep_comments),
                 )
-                if self.entry_in_process is None:
-                    raise Exception(f"Unable to create entry: {token.value}")
+                for index, part in enumerate(results):
+                    last_part = index + 1 == len(offsets)
+                    end = length if last_part else offsets[index + 1][0]
+                    self.merge_part(part, offsets[index], len(prefixes[index]), end)
+        except Exception:
+            # The errors of the parts refer to the parts, and an entry left open
+            # at the end of a part or a duplicate section or entry is handled
+            # differently by the parser of the whole EDS data. Parse again to
+            # raise the error at its position in the EDS data.
+            self.cached_comment.clear()
+            return self.parse()
+        self.on_EOF()
+        return self.eds
+
+    def merge_part(self, part, offsets, prefix_length, end):
+        """
+        Adds the items of a part parsed by parse_part to the EDS. offsets is the
+        (offset, section offset) pair of split_offsets, the part text is
+        eds_data[offset:end] and prefix_length is the length of its prefix.
+        """
+        (
+            sections,
+            eds_hcomment,
+            eds_fcomment,
+            skipped_sections,
+            diagnostics,
+            entry_open,
+        ) = part
+        eds = self.eds
+        offset, section_start = offsets
+        lines = self.line_index.line(offset) - 1
+        if prefix_length:
+            lines -= 1  # The section keyword line of the prefix
+        self.add_diagnostics(diagnostics, offset - prefix_length)
+        eds.skipped_sections.update(skipped_sections)
+        if offset == 0:
+            eds.hcomment = eds_hcomment
+
+        for keyword, line_number, section_offset, hcomment, fcomment, entries in sections:
+            section_offset += offset - prefix_length
+            if prefix_length and section_offset == offset - prefix_length:
+                # Entries of a section continued from the previous part
+                section = dict.get(eds.sections, keyword)
+                if section is not None and section.offset != section_start:
+                    # The parser of the previous part skipped the section as a
+                    # duplicate one
+                    raise Exception(f"Duplicate section! [{keyword}]")
+            elif keyword in eds.sections:
+                # The parser skips a duplicate section as a whole, including the
+                # errors in it
+                raise Exception(f"Duplicate section! [{keyword}]")
+            else:
+                section = eds.add_section(keyword, line_number + lines)
+                section.offset = section_offset
+                if section_offset == offset:
+                    hcomment = self.take_comment() + hcomment
+                section.hcomment = hcomment
+                section.fcomment = fcomment
+
+            for keyword, line_number, hcomment, fcomment, fields in entries:
                 if self.cached_comment:
-                    self.entry_in_process.hcomment = self.cached_comment
-                    self.cached_comment = ""
-                # Expecting at least one field.
-                self.expect(
-                    self.lexer.get_token(), TOKEN_TYPES.OPERATOR, SYMBOLS.ASSIGNMENT
+                    hcomment = self.take_comment() + hcomment
+                if section is None:
+                    continue
+                if keyword in section.entries:
+                    # The parser skips a duplicate entry up to its separator and
+                    # keeps the comments around it for the next item
+                    raise Exception(f'Duplicate Entry! [{section.keyword}]"{keyword}"')
+                entry = section.add_entry(keyword, line_number + lines)
+                entry.hcomment = hcomment
+                entry.fcomment = fcomment
+                for value, line_number, hcomment, fcomment in fields:
+                    field = entry.append_field(value, line_number + lines)
+                    if hcomment:
+                        field.hcomment = hcomment
+                    if fcomment:
+                        field.fcomment = fcomment
+        # Comments before a skipped section are dropped
+        self.cached_comment.clear()
+
+        if entry_open and end < len(self.eds_data):
+            # The parser reads the text of the next part as fields of the open
+            # entry, parse_parallel parses the EDS data again in one piece
+            raise EDSSyntaxError(
+                "Unterminated entry at the end of the section!",
+                end,
+                SYMBOLS.SEMICOLON,
+                "section keyword",
+            )
+        if eds_fcomment:
+            self.cached_comment.append(eds_fcomment)
+
+    def load_section(self, span):
+        """
+        Parses a section indexed in lazy mode.
+        """
+        eds = self.parse_text(span.eds_data[span.start : span.end])
+        self.add_diagnostics(eds.diagnostics, span.start)
+        section = eds.sections[span.keyword]
+        section.parent = self.eds
+        section.hcomment = span.hcomment
+        section.shift(span.start, span.line_number - 1)
+        return section
+
+    def add_diagnostics(self, diagnostics, offset):
+        """
+        Adds the diagnostics of a part of the EDS data starting at offset. The
+        positions in the messages are moved as well.
+        """
+        line_index = self.line_index
+        for diagnostic in diagnostics:
+            diagnostic_offset = diagnostic.offset + offset
+            self.eds.diagnostics.append(
+                diagnostic._replace(
+                    offset=diagnostic_offset,
+                    line=line_index.line(diagnostic_offset),
+                    col=line_index.col(diagnostic_offset),
+                    message=move_positions(diagnostic.message, offset, line_index),
                 )
-                self.state = State.EXPECT_FIELD
-                continue
+            )
 
-            raise Exception(__name__ + f":> Invalid Parser state! {self.state}")
+    def apply_text_edit(self, start, end, new_text):
+        """
+        Replaces eds_data[start:end] by new_text and reparses the sections the
+        edit touches. See EDS.apply_text_edit.
+        """
+        eds = self.eds
+        sections = eds.sections
+        eds_data = self.eds_data
+        if not isinstance(eds_data, str):
+            eds_data = str(eds_data, "ascii")
+        if not 0 <= start <= end <= len(eds_data):
+            raise Exception(f"Invalid text range! [{start}:{end}]")
 
-        return self.eds
+        keywords = list(sections)
+        offsets = [sections.offset(keyword) for keyword in keywords]
+        for keyword, offset in zip(keywords, offsets):
+            if offset is None:
+                raise Exception(f"Section is not part of the EDS data! [{keyword}]")
+        offsets.append(len(eds_data))
+
+        # Sections which text is touched by the edit. The edited text belongs
+        # to the last section starting before it, or to the text before the
+        # first section.
+        first = bisect_left(offsets, start, 0, len(keywords)) - 1
+        from_start = first < 0
+        if from_start:
+            first = 0
+        last = bisect_right(offsets, end, 0, len(keywords)) - 1
+        text_start = 0 if from_start else offsets[first]
+        old_text_end = offsets[last + 1]
+
+        new_data = eds_data[:start] + new_text + eds_data[end:]
+        delta = len(new_text) - (end - start)
+        delta_lines = new_text.count(SYMBOLS.LF) - eds_data.count(SYMBOLS.LF, start, end)
+        part = self.parse_text(new_data[text_start : old_text_end + delta])
+        reparsed = False
+        while True:
+            # An entry left open by the edit continues into the next section
+            while last + 1 < len(keywords) and part.parser.state not in (
+                State.EXPECT_SECTION,
+                State.EXPECT_SECTION_OR_ENTRY,
+            ):
+                last += 1
+                old_text_end = offsets[last + 1]
+                part = self.parse_text(new_data[text_start : old_text_end + delta])
+            new_sections = list(part.sections.values())
+            remaining = keywords[:first] + keywords[last + 1 :]
+            duplicate = any(section.keyword in remaining for section in new_sections)
+            # A section keyword broken by the edit is no section start, in
+            # recover mode the entries after it belong to the section before
+            broken = not from_start and (
+                not new_sections or new_sections[0].offset != 0
+            )
+            # The error recovery of a full parse may continue beyond the text
+            # of the edited sections
+            if reparsed or not (
+                broken or (self.recover and (duplicate or part.diagnostics))
+            ):
+                break
+            # Parse all the EDS data again
+            reparsed = True
+            first, last = 0, len(keywords) - 1
+            from_start = True
+            text_start = 0
+            old_text_end = offsets[last + 1]
+            part = self.parse_text(new_data)
+        for section in new_sections:
+            if section.keyword in remaining:
+                raise Exception(f"Duplicate section! [{section.keyword}]")
+        # Sections shared with clones of the EDS are copied before they change
+        revalidate = "Device Classification" in keywords[first : last + 1] or any(
+            section.keyword == "Device Classification" for section in new_sections
+        )
+        eds.unshare_sections(
+            remaining if revalidate and eds.validated else keywords[last + 1 :]
+        )
+
+        # Splice the new sections in
+        lines = new_data.count(SYMBOLS.LF, 0, text_start)
+        for section in new_sections:
+            section.parent = eds
+            section.shift(text_start, lines)
+        trailing_comment = part.fcomment
+        if from_start:
+            eds.hcomment = part.hcomment
+        elif new_sections:
+            new_sections[0].hcomment = sections.hcomment(keywords[first])
+        else:
+            trailing_comment = (
+                sections.hcomment(keywords[first]) + part.hcomment + trailing_comment
+            )
+        if last + 1 < len(keywords):
+            sections.set_hcomment(keywords[last + 1], trailing_comment)
+        else:
+            eds.fcomment = trailing_comment
+        for keyword in keywords[first : last + 1]:
+            if sections.is_loaded(keyword):
+                section = dict.__getitem__(sections, keyword)
+                eds.unindex_section(section)
+                if eds.field_columns is not None:
+                    eds.field_columns.release_section(section)
+        sections.splice(first, last + 1, new_sections)
+        eds.skipped_sections.update(part.skipped_sections)
+
+        # Move the sections after the edit
+        for keyword in keywords[last + 1 :]:
+            sections.shift(keyword, delta, delta_lines)
+        sections.set_eds_data(new_data)
+        self.eds_data = new_data
+        self.line_index = LineIndex(new_data)
+
+        diagnostics = eds.diagnostics
+        eds.diagnostics = [
+            diagnostic
+            for diagnostic in diagnostics
+            if diagnostic.offset < text_start
+        ]
+        self.add_diagnostics(part.diagnostics, text_start)
+        # The diagnostics after the edit are moved by the length change
+        self.add_diagnostics(
+            [
+                diagnostic
+                for diagnostic in diagnostics
+                if diagnostic.offset >= old_text_end
+            ],
+            delta,
+        )
+
+        # Revalidate the new sections. The protocol depends on the device
+        # classification, all sections are revalidated if it changes.
+        if eds.validated:
+            if revalidate:
+                eds.classification = None
+                eds.protocol = None
+                eds.ref_db.reset_protocol()
+                eds.validate()
+            else:
+                for section in new_sections:
+                    eds.validate_section(section)
+                for section in new_sections:
+                    eds.validate_references(section)
+        return new_sections
 
     def add_comment(self, comment, line):
+        comment = comment.strip() + "\n"
         if self.section_in_process is None:
-            self.eds.hcomment += comment.strip() + "\n"
+            if self.eds.sections or self.eds.skipped_sections:
+                # Comments after a skipped section belong to the next section
+                self.cached_comment.append(comment)
+            else:
+                self.header_comment.append(comment)
         elif self.field_in_process:
             if line == self.field_in_process.line_number:
-                self.field_in_process.fcomment += comment.strip() + "\n"
+                self.add_fcomment(self.field_in_process, comment)
             elif line > self.field_in_process.line_number:
                 if (
                     self.state == State.EXPECT_FIELD
                 ):  # The last field can hold only one line of comment (after semicolon)
-                    self.field_in_process.fcomment += comment.strip() + "\n"
+                    self.add_fcomment(self.field_in_process, comment)
                 else:
-                    self.cached_comment += comment.strip() + "\n"
+                    self.cached_comment.append(comment)
         elif self.entry_in_process:
             if line == self.entry_in_process.line_number:
-                self.entry_in_process.fcomment += comment.strip() + "\n"
+                self.add_fcomment(self.entry_in_process, comment)
             elif line > self.entry_in_process.line_number:
-                self.cached_comment += comment.strip() + "\n"
+                self.cached_comment.append(comment)
         elif self.section_in_process:
             if line == self.section_in_process.line_number:
-                self.section_in_process.fcomment += comment.strip() + "\n"
+                self.add_fcomment(self.section_in_process, comment)
             elif line > self.section_in_process.line_number:
-                self.cached_comment += comment.strip() + "\n"
+                self.cached_comment.append(comment)
         else:
             assert False
 
+    def add_fcomment(self, item, comment):
+        if item is not self.fcomment_item:
+            self.flush_fcomment()
+            self.fcomment_item = item
+        self.fcomment_lines.append(comment)
+
+    def flush_fcomment(self):
+        """
+        Joins the pending comment lines into the fcomment of their item.
+        """
+        if self.fcomment_lines:
+            self.fcomment_item.fcomment += "".join(self.fcomment_lines)
+            self.fcomment_lines.clear()
+        self.fcomment_item = None
+
+    def take_comment(self):
+        """
+        Returns the cached comment lines joined and clears them.
+        """
+        comment = "".join(self.cached_comment)
+        self.cached_comment.clear()
+        return comment
+
     def on_EOF(self):
+        self.flush_fcomment()
+        if self.header_comment:
+            self.eds.hcomment += "".join(self.header_comment)
+            self.header_comment.clear()
         # The rest of cached comments belong to no elements
-        self.eds.fcomment = self.cached_comment
-        self.cached_comment = ""
+        self.eds.fcomment = self.take_comment()
 
     def expect(self, token, expected_type, expected_value=None):
         if token.type == expected_type:
@@ -204,11 +875,17 @@ class Parser:
                 return
 
         if expected_value:
-            raise Exception(
-                f'Unexpected token! Expected: ("{TOKEN_TYPES.stringify(expected_type)}": {expected_value}) but found: {token}'
+            raise EDSSyntaxError(
+                f'Unexpected token! Expected: ("{TOKEN_TYPES.stringify(expected_type)}": {expected_value}) but found: {token}',
+                token.offset,
+                expected_value,
+                token.value,
             )
-        raise Exception(
-            f'Unexpected token! Expected: ("{TOKEN_TYPES.stringify(expected_type)}") but found: {token}'
+        raise EDSSyntaxError(
+            f'Unexpected token! Expected: ("{TOKEN_TYPES.stringify(expected_type)}") but found: {token}',
+            token.offset,
+            TOKEN_TYPES.stringify(expected_type),
+            token.value,
         )
 
     def match(self, token, expected_type, expected_value=None):
@@ -220,10 +897,145 @@ class Parser:
         return False
 
 
+def log_tracer(event, item):
+    """
+    Tracer that logs all parser events at DEBUG level.
+    """
+    logger.debug("%s: %s", EVENTS.stringify(event).lower(), item)
+
+
 class CIP_EDS:
-    def __new__(cls, eds_data=""):
-        if isinstance(eds_data, bytes):
-            eds_data = eds_data.decode("ascii")
-        eds = Parser(eds_data).parse()
+    def __new__(
+        cls,
+        eds_data="",
+        lexer_class=Lexer,
+        tracer=None,
+        sections=None,
+        lazy=False,
+        recover=False,
+        processes=1,
+        columnar=False,
+        keep_comments=True,
+        deferred_types=False,
+    ):
+        """
+        lexer_class selects the scanner. Lexer reads the EDS data char by char,
+        RegexLexer is the faster table driven scanner. RegexLexer also scans
+        bytes, mmap and memoryview data without decoding it up front.
+        tracer is an optional callable tracer(event, item), e.g. log_tracer.
+        sections is an optional collection of section keywords to be parsed,
+        e.g. {"File", "Device"}. All other sections are skipped.
+        In lazy mode the sections are parsed and validated the first time they
+        are accessed. Sections which are never accessed are saved unchanged.
+        The EDS keeps a reference to the EDS data.
+        In recover mode syntax errors do not raise. The parser continues at the
+        next section or entry and returns the partial EDS. The errors are listed
+        in EDS.diagnostics.
+        processes is the number of processes parsing parts of the EDS data in
+        parallel, all CPUs if None. EDS data smaller than PARALLEL_MIN_SIZE as
+        well as lazy and traced parsing use a single process.
+        With columnar set the fields are kept in columns, see FieldColumns.
+        Field objects are created on access.
+        With keep_comments=False the comments are skipped by the lexer and the
+        EDS holds no comments. Saving such an EDS drops the comments.
+        With deferred_types the validation only records the data type of each
+        field. The data type object of a field is created the first time its
+        data or value is read.
+        """
+        if (
+            not isinstance(eds_data, (str, TokenTable))
+            and not lexer_class.accepts_bytes
+        ):
+            eds_data = str(eds_data, "ascii")
+        parser = Parser(
+            eds_data,
+            lexer_class=lexer_class,
+            tracer=tracer,
+            sections=sections,
+            lazy=lazy,
+            recover=recover,
+            columnar=columnar,
+            keep_comments=keep_comments,
+        )
+        if (
+            processes != 1
+            and not lazy
+            and tracer is None
+            and not isinstance(eds_data, TokenTable)
+            and len(eds_data) >= PARALLEL_MIN_SIZE
+        ):
+            eds = parser.parse_parallel(processes)
+        else:
+            eds = parser.parse()
+        eds.deferred_types = deferred_types
         eds.validate()
         return eds
+
+    @staticmethod
+    def events(eds_data, lexer_class=RegexLexer, comments=False):
+        """
+        Streams the EDS content as EdsEvent tuples. Neither an EDS object is
+        created nor the EDS content validated. See Parser.events.
+        """
+        if (
+            not isinstance(eds_data, (str, TokenTable))
+            and not lexer_class.accepts_bytes
+        ):
+            eds_data = str(eds_data, "ascii")
+        return Parser(
+            eds_data, lexer_class=lexer_class, keep_comments=comments
+        ).events(comments)
+
+    @classmethod
+    def from_path(
+        cls,
+        path,
+        lexer_class=RegexLexer,
+        tracer=None,
+        sections=None,
+        lazy=False,
+        recover=False,
+        processes=1,
+        columnar=False,
+        keep_comments=True,
+        deferred_types=False,
+    ):
+        """
+        Parses an EDS file. The file is memory-mapped instead of being read
+        into memory if the lexer accepts bytes. In lazy mode the file is read
+        since the EDS data is kept beyond the parsing.
+        """
+        with open(path, "rb") as src:
+            if (
+                lazy
+                or not lexer_class.accepts_bytes
+                or os.fstat(src.fileno()).st_size == 0
+            ):
+                return cls(
+                    src.read(),
+                    lexer_class,
+                    tracer,
+                    sections,
+                    lazy,
+                    recover,
+                    processes,
+                    columnar,
+                    keep_comments,
+                    deferred_types,
+                )
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as eds_data:
+                eds = cls(
+                    eds_data,
+                    lexer_class,
+                    tracer,
+                    sections,
+                    lazy,
+                    recover,
+                    processes,
+                    columnar,
+                    keep_comments,
+                    deferred_types,
+                )
+            # The mapping is closed, text edits are not available
+            eds.parser = None
+            return eds
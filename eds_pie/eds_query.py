@@ -0,0 +1,212 @@
+import re
+from fnmatch import translate
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+
+# Names of a field list, optionally double quoted: [name, "name, with comma", 3]
+FIELD_NAME_PATTERN = re.compile(r'\s*(?:"([^"]*)"|([^,]*?))\s*(?:,|$)')
+
+GLOB_SYMBOLS = "*?["
+
+DIGITS = "0123456789"
+
+get_value = attrgetter("value")
+
+
+def normalize_field_name(field_name):
+    return field_name.replace(" ", "").lower()
+
+
+class KeywordPattern:
+    """
+    Matches section or entry keywords against a keyword or a glob pattern.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.keyword = None  # The pattern is a plain keyword
+        self.prefix = None  # The pattern is a prefix followed by "*"
+        self.regex = None
+        body = pattern[:-1] if pattern.endswith("*") else pattern
+        if not any(symbol in pattern for symbol in GLOB_SYMBOLS):
+            self.keyword = pattern
+        elif not any(symbol in body for symbol in GLOB_SYMBOLS):
+            self.prefix = body
+        else:
+            self.regex = re.compile(translate(pattern))
+
+    def select(self, items):
+        """
+        Returns the values of a dictionary by keyword which keywords match.
+        """
+        if self.keyword is not None:
+            item = items.get(self.keyword)
+            return [] if item is None else [item]
+        if self.prefix is not None:
+            prefix = self.prefix
+            return [item for keyword, item in items.items() if keyword.startswith(prefix)]
+        match = self.regex.match
+        return [item for keyword, item in items.items() if match(keyword)]
+
+    def select_keywords(self, keywords):
+        if self.keyword is not None:
+            return [self.keyword] if self.keyword in keywords else []
+        if self.prefix is not None:
+            return [keyword for keyword in keywords if keyword.startswith(self.prefix)]
+        match = self.regex.match
+        return [keyword for keyword in keywords if match(keyword)]
+
+
+class Query:
+    """
+    Compiled path query selecting field values of EDS entries:
+
+        section/entry
+        section/entry/[field, field, ...]
+
+    section and entry are keywords or glob patterns, e.g. Params/Param*.
+    Fields are selected by name or index, names with a comma are double quoted.
+    Field names ignore spaces and case. Without a field list all field values
+    of an entry are selected.
+    Each selected entry results in a row (section keyword, entry keyword,
+    value, ...). A missing field results in the value None.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        fields = None
+        entry_path = path
+        if path.endswith("]"):
+            start = path.rfind("/[")
+            if start < 0:
+                raise Exception(f"Invalid query! Field list without entry: {path}")
+            entry_path = path[:start]
+            fields = parse_fields(path[start + 2 : -1], path)
+        section_pattern, separator, entry_pattern = entry_path.rpartition("/")
+        if not separator or not section_pattern or not entry_pattern:
+            raise Exception(f"Invalid query! Expected section/entry: {path}")
+        self.section_pattern = KeywordPattern(section_pattern)
+        self.entry_pattern = KeywordPattern(entry_pattern)
+        self.fields = fields
+
+    def entries(self, eds):
+        """
+        Returns the (section, entry) pairs selected in an EDS.
+        """
+        sections = eds.sections
+        return [
+            (section, entry)
+            for section in [
+                sections[keyword]
+                for keyword in self.section_pattern.select_keywords(sections)
+            ]
+            for entry in self.entry_pattern.select(section.entries)
+        ]
+
+    def rows(self, eds):
+        """
+        Returns the rows of the entries selected in an EDS as a list of tuples.
+        """
+        if self.fields is None:
+            return [
+                (section.keyword, entry.keyword, *[field.value for field in entry.fields])
+                for section, entry in self.entries(eds)
+            ]
+
+        rows = []
+        # Field getters by (section keyword, entry keyword prefix, number of
+        # fields). Enumerated entries of a section share their field names.
+        getters = {}
+        for section, entry in self.entries(eds):
+            fields = entry.fields
+            kind = (section.keyword, entry.keyword.rstrip(DIGITS), len(fields))
+            getter = getters.get(kind)
+            if getter is None:
+                getter = getters[kind] = self.field_getter(entry)
+            rows.append((section.keyword, entry.keyword) + getter(fields))
+        return rows
+
+    def field_getter(self, entry):
+        """
+        Returns a function which returns the values of the selected fields
+        out of a list of fields like the one of entry.
+        """
+        indexes = self.resolve(entry)
+        if None in indexes:
+            return lambda fields: tuple(
+                None if index is None else fields[index].value for index in indexes
+            )
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda fields: (fields[index].value,)
+        get_fields = itemgetter(*indexes)
+        return lambda fields: tuple(map(get_value, get_fields(fields)))
+
+    def resolve(self, entry):
+        """
+        Returns the indexes of the selected fields of an entry. Fields missing
+        in the entry have the index None.
+        """
+        size = len(entry.fields)
+        indexes = []
+        for field in self.fields:
+            index = field if isinstance(field, int) else entry.get_field_index(field)
+            indexes.append(None if index is None or index >= size else index)
+        return indexes
+
+    def columns(self, eds):
+        """
+        Returns the rows of the entries selected in an EDS as a list of columns.
+        The first column holds the section keywords, the second the entry
+        keywords. Entries with fewer fields are padded with None.
+        """
+        rows = self.rows(eds)
+        if not rows:
+            width = 2 if self.fields is None else len(self.fields) + 2
+            return [[] for _ in range(width)]
+        width = max(len(row) for row in rows)
+        return [
+            [row[index] if index < len(row) else None for row in rows]
+            for index in range(width)
+        ]
+
+    def run(self, eds):
+        """
+        Returns the rows of an EDS or a list with the rows of each EDS of a
+        list of EDS objects.
+        """
+        if hasattr(eds, "sections"):
+            return self.rows(eds)
+        return [self.rows(document) for document in eds]
+
+    def __repr__(self):
+        return f"QUERY({self.path})"
+
+
+def parse_fields(field_list, path):
+    fields = []
+    for match in FIELD_NAME_PATTERN.finditer(field_list):
+        if match.end() == match.start():
+            break
+        quoted, name = match.groups()
+        if quoted is not None:
+            fields.append(normalize_field_name(quoted))
+        elif name.isdigit():
+            fields.append(int(name))
+        elif name:
+            fields.append(normalize_field_name(name))
+        else:
+            raise Exception(f"Invalid query! Empty field name: {path}")
+        if match.end() == len(field_list):
+            break
+    if not fields:
+        raise Exception(f"Invalid query! Empty field list: {path}")
+    return tuple(fields)
+
+
+@lru_cache(maxsize=256)
+def compile_query(path):
+    """
+    Returns the compiled Query of a path. Compiled queries are cached.
+    """
+    return Query(path)
@@ -0,0 +1,177 @@
+import json
+import logging
+import marshal
+import os
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REFERENCES_DIR = Path(__file__).parent / "references"
+
+SCHEMA_FILE = "edslib_schema.json"
+
+# The cache holds the data of the libraries as marshal data. The marshal format
+# depends on the Python version, like the .pyc files the cache is kept per
+# interpreter in __pycache__.
+CACHE_DIR = "__pycache__"
+CACHE_VERSION = 1
+
+# Nodes of a library with keys chosen by the library. The keys of these nodes
+# in the schema are examples.
+SCHEMA_MAPPINGS = {"sections", "entries", "data_types"}
+
+
+def cache_path(ref_dir=REFERENCES_DIR):
+    return (
+        Path(ref_dir) / CACHE_DIR / f"references.{sys.implementation.cache_tag}.marshal"
+    )
+
+
+def reference_sources(ref_dir=REFERENCES_DIR):
+    """
+    Returns the (name, mtime in ns, size) of each JSON file of a references
+    directory. A cache built from other sources is out of date.
+    """
+    sources = []
+    for file in Path(ref_dir).iterdir():
+        if file.suffix == ".json":
+            stat = file.stat()
+            sources.append((file.name, stat.st_mtime_ns, stat.st_size))
+    return sorted(sources)
+
+
+def load_references(ref_dir=REFERENCES_DIR):
+    """
+    Returns the data of the reference libraries of a references directory as
+    a list. The libraries are read from the cache if it is up to date, else
+    they are read from the JSON files and checked against the schema, and the
+    cache is rebuilt.
+    """
+    sources = reference_sources(ref_dir)
+    try:
+        # marshal.load reads a file in small pieces, loads is much faster
+        with cache_path(ref_dir).open("rb") as src:
+            cache = marshal.loads(src.read())
+        if cache["version"] == CACHE_VERSION and cache["sources"] == sources:
+            return cache["libraries"]
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+    return build_cache(ref_dir, sources)
+
+
+def build_cache(ref_dir=REFERENCES_DIR, sources=None):
+    """
+    Reads and checks the reference libraries of a references directory and
+    writes the cache. The cache is not written if a library fails the check,
+    so the error is logged on each load until the library is fixed.
+    """
+    if sources is None:
+        sources = reference_sources(ref_dir)
+    ref_dir = Path(ref_dir)
+    libraries = []
+    valid = True
+    schema = None
+    if any(name == SCHEMA_FILE for name, _, _ in sources):
+        with (ref_dir / SCHEMA_FILE).open("r", encoding="utf-8") as src:
+            schema = json.loads(src.read())
+    for name, _, _ in sources:
+        if name == SCHEMA_FILE:
+            continue
+        with (ref_dir / name).open("r", encoding="utf-8") as src:
+            data = json.loads(src.read())
+        if data.get("project", None) != "eds_pie":
+            continue
+        if schema is not None:
+            errors = check_library(data, schema)
+            if errors:
+                valid = False
+                for error in errors:
+                    logger.error(f"Invalid reference library {name}: {error}")
+                continue
+        libraries.append(data)
+
+    if valid:
+        write_cache(
+            cache_path(ref_dir),
+            {"version": CACHE_VERSION, "sources": sources, "libraries": libraries},
+        )
+    return libraries
+
+
+def write_cache(path, cache):
+    # The cache is replaced at once, a process loading it at the same time
+    # reads either the old or the new cache
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(exist_ok=True)
+        with temp_path.open("wb") as dst:
+            dst.write(marshal.dumps(cache))
+        os.replace(temp_path, path)
+    except OSError as error:
+        logger.info(f"Unable to write the reference cache {path}: {error}")
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+
+
+def check_library(data, schema):
+    """
+    Returns the errors of a reference library checked against the schema
+    template. The schema version and the project must match and the library
+    needs a lib_name and sections. All other keys of the template are
+    optional, but their values must have the type of the template value or be
+    null.
+    """
+    errors = []
+    if data.get("schema_verison") != schema.get("schema_verison"):
+        errors.append(f"schema version {data.get('schema_verison')} is not supported")
+    for key in ("lib_name", "sections"):
+        if key not in data:
+            errors.append(f"missing {key}")
+    check_node(data, schema, "", errors)
+    return errors
+
+
+def check_node(value, template, path, errors, mapping=False):
+    """
+    Checks a node of a library against a template node. The items of a
+    mapping node must match one of the example items of the template.
+    """
+    if value is None:
+        return
+    if isinstance(template, dict):
+        if not isinstance(value, dict):
+            errors.append(f"{path or '/'} is not an object")
+            return
+        for key, item in value.items():
+            item_path = f"{path}/{key}"
+            if not mapping:
+                if key in template:
+                    check_node(
+                        item, template[key], item_path, errors, key in SCHEMA_MAPPINGS
+                    )
+                continue
+            item_errors = []
+            for example in template.values():
+                item_errors = []
+                check_node(item, example, item_path, item_errors)
+                if not item_errors:
+                    break
+            errors.extend(item_errors)
+    elif isinstance(template, list):
+        if not isinstance(value, list):
+            errors.append(f"{path} is not a list")
+        elif template and isinstance(template[0], dict):
+            for index, item in enumerate(value):
+                check_node(item, template[0], f"{path}/{index}", errors)
+    elif not isinstance(value, type(template)):
+        errors.append(f"{path} is not of type {type(template).__name__}")
+
+
+if __name__ == "__main__":
+    # Builds the cache, e.g. at install time
+    logging.basicConfig(level=logging.INFO)
+    libraries = build_cache()
+    print(f"Cached {len(libraries)} reference libraries in {cache_path()}")
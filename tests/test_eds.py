@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import pytest
+
+import eds_pie.eds_pie as eds_pie
+from eds_pie.eds_pie import CIP_EDS
+
+DEMO_EDS = (Path(__file__).parent.parent / "demo.eds").read_text()
+
+
+def tree(eds):
+    """
+    Returns the sections, entries and fields of an EDS with their positions.
+    """
+    return [
+        (
+            section.keyword,
+            section.line_number,
+            [
+                (
+                    entry.keyword,
+                    entry.line_number,
+                    [(field.raw_value, field.line_number) for field in entry.fields],
+                )
+                for entry in section.entries.values()
+            ],
+        )
+        for section in eds.sections.values()
+    ]
+
+
+def test_failed_commit_restores_class_id_index():
+    eds = CIP_EDS(DEMO_EDS)
+    sections_by_class_id = dict(eds.sections_by_class_id)
+    with pytest.raises(Exception):
+        with eds.transaction():
+            eds.add_section("Identity Class")
+            eds.add_entry("Identity Class", "Service_Description1")
+            for value in ['"Reset"', "5", "1", "Param9999", "Param9999"]:
+                eds.add_field("Identity Class", "Service_Description1", value)
+    assert not eds.has_section("Identity Class")
+    assert eds.sections_by_class_id == sections_by_class_id
+
+
+# Param1000 and copies of it which make the Params section span several parts
+PARAM = DEMO_EDS[DEMO_EDS.index("    Param1000 =") : DEMO_EDS.index("[Connection")]
+PARAMS = "".join(PARAM.replace("Param1000", f"Param{n}") for n in range(2000, 2010))
+
+PARALLEL_INPUTS = {
+    "valid": DEMO_EDS,
+    "missing value": DEMO_EDS.replace("0x0210,", "0x0210 = ,", 1),
+    "open entry before a section keyword": DEMO_EDS.replace(
+        "[Params]", "    Foo = 1\n[Bar]\n[Params]", 1
+    ),
+    "duplicate entry": DEMO_EDS.replace(
+        "[Connection Manager]", PARAMS + PARAM + "[Connection Manager]", 1
+    ),
+    "duplicate section": DEMO_EDS.replace(
+        "[Connection Manager]",
+        "[Params]\n" + PARAMS.replace("0x0210,", "0x0210 = ,") + "[Connection Manager]",
+        1,
+    ),
+}
+
+
+@pytest.mark.parametrize("name", PARALLEL_INPUTS)
+def test_parallel_recover_matches_serial(monkeypatch, name):
+    eds_data = PARALLEL_INPUTS[name]
+    monkeypatch.setattr(eds_pie, "PARALLEL_MIN_SIZE", 0)
+    monkeypatch.setattr(eds_pie, "PARALLEL_PART_SIZE", 1024)
+    serial = CIP_EDS(eds_data, recover=True)
+    parallel = CIP_EDS(eds_data, recover=True, processes=2)
+    assert parallel.diagnostics == serial.diagnostics
+    assert tree(parallel) == tree(serial)
+    assert str(parallel) == str(serial)
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [(4927, 4930, ""), (2048, 2048, " ProdName1,")],
+        [(0, 0, "$ new line\n")],
+        [(DEMO_EDS.index("0x0210,"), DEMO_EDS.index("0x0210,") + 7, "0x0210 = ,")],
+        [(DEMO_EDS.index("[Params]"), DEMO_EDS.index("[Params]") + 1, "")],
+        [(DEMO_EDS.index("[Assembly]"), DEMO_EDS.index("[Assembly]"), "[Params]\n")],
+    ],
+)
+def test_text_edit_matches_full_parse(edits):
+    eds = CIP_EDS(DEMO_EDS, recover=True)
+    eds_data = DEMO_EDS
+    for start, end, new_text in edits:
+        eds.apply_text_edit(start, end, new_text)
+        eds_data = eds_data[:start] + new_text + eds_data[end:]
+    full = CIP_EDS(eds_data, recover=True)
+    assert eds.diagnostics == full.diagnostics
+    assert tree(eds) == tree(full)
+    assert str(eds) == str(full)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_clone_isolation(columnar):
+    eds = CIP_EDS(DEMO_EDS, columnar=columnar)
+    eds_str = str(eds)
+    clone = eds.clone()
+    assert str(clone) == eds_str
+    assert clone.get_section("File") is eds.get_section("File")
+
+    clone.set_value("Device", "ProdName", 0, "Variant")
+    clone.add_entry("Device", "Foo")
+    clone.remove_entry("Device", "VendCode", removetree=True)
+    clone.remove_section("Params", removetree=True)
+    assert clone.get_value("Device", "ProdName") == "Variant"
+    assert str(eds) == eds_str
+
+    eds.set_value("Device", "ProdName", 0, "Changed")
+    assert clone.get_value("Device", "ProdName") == "Variant"
+    assert not eds.has_entry("Device", "Foo")
+
+
+def test_lazy_round_trip():
+    full = CIP_EDS(DEMO_EDS)
+    lazy = CIP_EDS(DEMO_EDS, lazy=True)
+    assert len(lazy.sections.loaded()) < len(full.sections)
+    # Untouched sections are saved as they are
+    assert str(CIP_EDS(str(lazy))) == str(full)
+    assert tree(lazy) == tree(full)
+    assert str(lazy) == str(full)